@@ -1,18 +1,22 @@
 """AI endpoints: prompt, chat (SSE), improve-text."""
-import json
+from datetime import datetime, timezone
 from typing import Any
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from app.core.deps import get_current_user_id
-from app.core.errors import AIServiceError
+from app.core.errors import AIServiceError, NotFoundError
 from app.db.supabase import get_supabase
 from app.services.ai_service import generate_prompt, improve_text, chat_stream
+from app.services.chat_streams import get_stream, parse_last_event_id, start_stream, subscribe
 
 router = APIRouter()
 
+CONVERSATION_SUMMARY_COLUMNS = "id, entry_id, conversation_type, summary, message_count, last_message_role, last_message_preview, created_at, updated_at"
+
 
 class ImproveTextRequest(BaseModel):
     text: str
@@ -51,8 +55,15 @@ async def improve_writing(
 @router.post("/chat")
 async def ai_chat_stream(
     body: ChatRequest,
+    last_event_id: str | None = Header(None),
     user_id: str = Depends(get_current_user_id),
 ):
+    """Streams the reply; retrying with `Last-Event-ID` resumes the same reply instead of asking the LLM again."""
+    resume = parse_last_event_id(last_event_id)
+    if resume:
+        stream = get_stream(resume[0], user_id)
+        if stream is not None:
+            return _sse(stream, resume[1])
     supabase = get_supabase()
     # Load recent conversation or create new
     conv_r = supabase.table("ai_conversations").select("id, messages").eq("user_id", user_id).order("updated_at", desc=True).limit(1).execute()
@@ -62,42 +73,111 @@ async def ai_chat_stream(
         conv_id = conv_r.data[0]["id"]
         history = conv_r.data[0].get("messages") or []
     history.append({"role": "user", "content": body.message})
+    new_conversation = conv_id is None
+    conv_id = conv_id or str(uuid4())
+
+    def persist(assistant_content: str) -> None:
+        # Written before the stream reports done (blocking, in the threadpool) so the next turn reads this one
+        history.append({"role": "assistant", "content": assistant_content})
+        row = {"entry_id": body.entry_id, "messages": history, "updated_at": datetime.now(timezone.utc).isoformat()}
+        if new_conversation:
+            supabase.table("ai_conversations").insert({**row, "id": conv_id, "user_id": user_id}).execute()
+        else:
+            supabase.table("ai_conversations").update(row).eq("id", conv_id).eq("user_id", user_id).execute()
+
+    stream = start_stream(user_id, lambda: chat_stream(user_id, body.message, history[:-1]), persist)
+    return _sse(stream, 0, conv_id)
+
+
+@router.get("/chat/streams/{stream_id}")
+async def resume_chat_stream(
+    stream_id: str,
+    last_event_id: str | None = Header(None),
+    user_id: str = Depends(get_current_user_id),
+):
+    """Re-attach to a reply still in progress or recently finished (EventSource reconnects use GET)."""
+    stream = get_stream(stream_id, user_id)
+    if stream is None:
+        raise NotFoundError("Chat stream not found or expired")
+    resume = parse_last_event_id(last_event_id)
+    return _sse(stream, resume[1] if resume and resume[0] == stream_id else 0)
 
-    async def event_stream():
-        full = []
-        try:
-            for chunk in chat_stream(user_id, body.message, history[:-1]):
-                full.append(chunk)
-                yield f"data: {json.dumps({'content': chunk})}\n\n"
-            # Append assistant message and persist
-            assistant_content = "".join(full)
-            history.append({"role": "assistant", "content": assistant_content})
-            if conv_id:
-                supabase.table("ai_conversations").update({"messages": history, "entry_id": body.entry_id}).eq("id", conv_id).eq("user_id", user_id).execute()
-            else:
-                supabase.table("ai_conversations").insert({"user_id": user_id, "entry_id": body.entry_id, "messages": history}).execute()
-        except AIServiceError:
-            yield f"data: {json.dumps({'error': 'AI temporarily unavailable'})}\n\n"
-
-    return StreamingResponse(
-        event_stream(),
-        media_type="text/event-stream",
-        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
-    )
+
+def _sse(stream, after: int, conversation_id: str | None = None) -> StreamingResponse:
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Stream-Id": stream.stream_id}
+    if conversation_id:
+        headers["X-Conversation-Id"] = conversation_id
+    return StreamingResponse(subscribe(stream, after), media_type="text/event-stream", headers=headers)
 
 
 @router.get("/conversation-history")
 async def get_conversation_history(
-    limit: int = 5,
+    limit: int = Query(5, ge=1, le=50),
     user_id: str = Depends(get_current_user_id),
 ):
+    """Conversation metadata only; fetch messages page by page from /conversations/{id}/messages."""
     supabase = get_supabase()
-    r = supabase.table("ai_conversations").select("id, messages, created_at, updated_at").eq("user_id", user_id).order("updated_at", desc=True).limit(limit).execute()
+    r = supabase.table("ai_conversations").select(CONVERSATION_SUMMARY_COLUMNS).eq("user_id", user_id).order("updated_at", desc=True).limit(limit).execute()
     return {"conversations": r.data or []}
 
 
+@router.get("/conversations/{conversation_id}/messages")
+async def get_conversation_messages(
+    conversation_id: UUID,
+    before: int | None = Query(None, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    user_id: str = Depends(get_current_user_id),
+):
+    """Messages in chronological order, newest page first; pass `next_before` back as `before` for older ones."""
+    supabase = get_supabase()
+    r = supabase.rpc("conversation_messages", {
+        "p_conversation_id": str(conversation_id),
+        "p_user_id": user_id,
+        "p_before": before,
+        "p_limit": limit,
+    }).execute()
+    rows = r.data or []
+    if not rows:
+        exists = supabase.table("ai_conversations").select("id").eq("id", str(conversation_id)).eq("user_id", user_id).execute()
+        if not exists.data:
+            raise NotFoundError("Conversation not found")
+    rows.reverse()
+    oldest = rows[0]["idx"] if rows else None
+    return {
+        "messages": rows,
+        "next_before": oldest if len(rows) == limit and oldest else None,
+    }
+
+
 @router.delete("/conversation-history")
 async def clear_conversation_history(user_id: str = Depends(get_current_user_id)):
     supabase = get_supabase()
     supabase.table("ai_conversations").delete().eq("user_id", user_id).execute()
     return {"message": "Conversation history cleared"}
+
+
+@router.get("/insights")
+async def list_insights(
+    insight_type: str | None = None,
+    unread_only: bool = False,
+    limit: int = Query(10, ge=1, le=50),
+    user_id: str = Depends(get_current_user_id),
+):
+    """Precomputed weekly/monthly reflections, newest period first."""
+    supabase = get_supabase()
+    q = supabase.table("ai_insights").select("id, insight_type, title, content, date_range_start, date_range_end, is_read, created_at").eq("user_id", user_id)
+    if insight_type:
+        q = q.eq("insight_type", insight_type)
+    if unread_only:
+        q = q.eq("is_read", False)
+    r = q.order("date_range_start", desc=True).limit(limit).execute()
+    return {"insights": r.data or []}
+
+
+@router.post("/insights/{insight_id}/read")
+async def mark_insight_read(insight_id: UUID, user_id: str = Depends(get_current_user_id)):
+    supabase = get_supabase()
+    r = supabase.table("ai_insights").update({"is_read": True}).eq("id", str(insight_id)).eq("user_id", user_id).execute()
+    if not r.data:
+        raise NotFoundError("Insight not found")
+    return {"message": "Insight marked as read"}
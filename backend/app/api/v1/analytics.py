@@ -1,33 +1,54 @@
 """Analytics: mood trends, writing stats, streaks, dashboard."""
+from collections import Counter
+from dataclasses import asdict
+
 from fastapi import APIRouter, Depends, Query
 
+from app.core.concurrency import fan_out
 from app.core.deps import get_current_user_id
+from app.core.errors import NotFoundError, ValidationError
 from app.db.supabase import get_supabase
+from app.services import entry_pipeline
+from app.services.analytics_service import BUCKETS, bucket_moods, parse_period
 
 router = APIRouter()
 
+_PAGE_SIZE = 1000  # PostgREST's default row cap
+
 
 @router.get("/mood-trends")
 async def mood_trends(
-    period: str = Query("30d"),
+    period: str = Query("30d"),  # 7d | 30d | 90d | 1y | all
+    bucket: str = Query("day"),  # day | week | month
+    source: str = Query("user"),  # user | inferred (offline sentiment)
     user_id: str = Depends(get_current_user_id),
 ):
-    supabase = get_supabase()
-    r = supabase.table("journal_entries").select("entry_date, mood").eq("user_id", user_id).is_("deleted_at", "null").eq("is_draft", False).not_.is_("mood", "null").order("entry_date").execute()
-    # Group by date
-    by_date = {}
-    for row in (r.data or []):
-        d = str(row.get("entry_date", ""))
-        if d not in by_date:
-            by_date[d] = []
-        by_date[d].append(row.get("mood"))
-    return {"period": period, "by_date": by_date}
+    start = parse_period(period)
+    if bucket not in BUCKETS:
+        raise ValidationError(f"Invalid bucket; use one of {', '.join(BUCKETS)}", field="bucket", constraint="enum")
+    if source not in ("user", "inferred"):
+        raise ValidationError("Invalid source; use user or inferred", field="source", constraint="enum")
+    # Bucketed in SQL; page the (at most one row per bucket) result past the row cap
+    params = {"p_user_id": user_id, "p_start": str(start) if start else None, "p_bucket": bucket, "p_inferred": source == "inferred"}
+    rows: list[dict] = []
+    while True:
+        page = get_supabase().rpc("mood_buckets", params).range(len(rows), len(rows) + _PAGE_SIZE - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < _PAGE_SIZE:
+            break
+    return {
+        "period": period,
+        "bucket": bucket,
+        "source": source,
+        "start_date": str(start) if start else None,
+        "buckets": bucket_moods(rows),
+    }
 
 
 @router.get("/writing-stats")
 async def writing_stats(user_id: str = Depends(get_current_user_id)):
     supabase = get_supabase()
-    r = supabase.table("journal_entries").select("word_count, character_count, entry_date, content").eq("user_id", user_id).is_("deleted_at", "null").eq("is_draft", False).execute()
+    r = supabase.table("journal_entries").select("word_count, entry_date, reading_time_seconds, sentence_count").eq("user_id", user_id).is_("deleted_at", "null").eq("is_draft", False).execute()
     data = r.data or []
     total_words = sum(x.get("word_count", 0) for x in data)
     total_entries = len(data)
@@ -38,6 +59,8 @@ async def writing_stats(user_id: str = Depends(get_current_user_id)):
         "total_entries": total_entries,
         "total_words": total_words,
         "average_entry_length": avg_words,
+        "total_reading_time_seconds": sum(x.get("reading_time_seconds") or 0 for x in data),
+        "average_sentences_per_entry": round(sum(x.get("sentence_count") or 0 for x in data) / total_entries, 1) if total_entries else 0,
         "longest_entry": {"words": longest.get("word_count", 0), "date": str(longest.get("entry_date", ""))} if longest else None,
         "shortest_entry": {"words": shortest.get("word_count", 0), "date": str(shortest.get("entry_date", ""))} if shortest else None,
     }
@@ -61,8 +84,10 @@ async def streaks(user_id: str = Depends(get_current_user_id)):
 @router.get("/dashboard")
 async def dashboard(user_id: str = Depends(get_current_user_id)):
     supabase = get_supabase()
-    entries_r = supabase.table("journal_entries").select("id, word_count, entry_date, mood").eq("user_id", user_id).is_("deleted_at", "null").eq("is_draft", False).execute()
-    streak_r = supabase.table("streaks").select("current_streak, longest_streak").eq("user_id", user_id).execute()
+    entries_r, streak_r = await fan_out(
+        supabase.table("journal_entries").select("id, word_count, entry_date, mood").eq("user_id", user_id).is_("deleted_at", "null").eq("is_draft", False).execute,
+        supabase.table("streaks").select("current_streak, longest_streak").eq("user_id", user_id).execute,
+    )
     entries = entries_r.data or []
     total_entries = len(entries)
     total_words = sum(e.get("word_count", 0) for e in entries)
@@ -81,18 +106,29 @@ async def dashboard(user_id: str = Depends(get_current_user_id)):
     }
 
 
+@router.post("/backfill", status_code=202)
+async def derived_backfill(user_id: str = Depends(get_current_user_id)):
+    """Start computing text statistics, sentiment and geohash for entries written before they were stored."""
+    return asdict(entry_pipeline.get_backfill_jobs().start(user_id))
+
+
+@router.get("/backfill")
+async def derived_backfill_status(user_id: str = Depends(get_current_user_id)):
+    job = entry_pipeline.get_backfill_jobs().jobs.get(user_id)
+    if job is None:
+        raise NotFoundError("No backfill has run")
+    return asdict(job)
+
+
 @router.get("/word-cloud")
 async def word_cloud(
     limit: int = Query(50, ge=1, le=200),
     user_id: str = Depends(get_current_user_id),
 ):
     supabase = get_supabase()
-    r = supabase.table("journal_entries").select("content").eq("user_id", user_id).is_("deleted_at", "null").eq("is_draft", False).execute()
-    from collections import Counter
-    import re
-    stop = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "is", "it", "i", "my", "me", "we", "you", "they", "this", "that"}
-    words = []
+    # Per-entry keyword counts are stored at write time; merge them instead of re-tokenizing content
+    r = supabase.table("journal_entries").select("keywords").eq("user_id", user_id).is_("deleted_at", "null").eq("is_draft", False).not_.is_("keywords", "null").execute()
+    counts = Counter()
     for row in (r.data or []):
-        words.extend(re.findall(r"\b[a-z]{3,}\b", (row.get("content") or "").lower()))
-    counts = Counter(w for w in words if w not in stop).most_common(limit)
-    return {"words": [{"word": w, "count": c} for w, c in counts]}
+        counts.update(row["keywords"])
+    return {"words": [{"word": w, "count": c} for w, c in counts.most_common(limit)]}
@@ -2,7 +2,7 @@
 from fastapi import APIRouter, Depends, status
 from fastapi.responses import JSONResponse
 
-from app.core.deps import get_current_user_id
+from app.core.deps import get_current_token_payload, get_current_user_id
 from app.core.errors import ConflictError, UnauthorizedError, ValidationError
 from app.schemas.auth import (
     RegisterRequest,
@@ -11,6 +11,7 @@ from app.schemas.auth import (
     ForgotPasswordRequest,
     ResetPasswordRequest,
     RefreshRequest,
+    LogoutRequest,
 )
 from app.services.auth_service import (
     register as do_register,
@@ -55,8 +56,11 @@ async def refresh(body: RefreshRequest):
 
 
 @router.post("/logout")
-async def logout(user_id: str = Depends(get_current_user_id)):
-    do_logout(user_id)
+async def logout(
+    body: LogoutRequest | None = None,
+    token_payload: dict = Depends(get_current_token_payload),
+):
+    do_logout(token_payload, body.refresh_token if body else None)
     return {"message": "Logged out"}
 
 
@@ -0,0 +1,36 @@
+"""Global templates and prompts catalogs, served from in-process snapshots."""
+from fastapi import APIRouter, Request
+from fastapi.responses import Response
+
+from app.services import catalog
+from app.services.catalog import Catalog
+
+router = APIRouter()
+
+CACHE_CONTROL = "public, max-age=300"
+
+
+def _not_modified(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison (RFC 9110 13.1.2): `W/` prefixes are ignored; the header may list several tags."""
+    if not if_none_match:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+async def _serve(cat: Catalog, request: Request, category: str | None) -> Response:
+    body = (await cat.current()).body(category)
+    headers = {"ETag": body.etag, "Cache-Control": CACHE_CONTROL}
+    if _not_modified(request.headers.get("if-none-match"), body.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body.content, media_type="application/json", headers=headers)
+
+
+@router.get("/templates")
+async def list_templates(request: Request, category: str | None = None):
+    return await _serve(catalog.templates, request, category)
+
+
+@router.get("/prompts")
+async def list_prompts(request: Request, category: str | None = None):
+    return await _serve(catalog.prompts, request, category)
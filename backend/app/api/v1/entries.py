@@ -1,17 +1,31 @@
 """Journal entries CRUD and list."""
-from datetime import date, time
+from datetime import date, datetime, time, timedelta, timezone
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, Query
 from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
 
+from app.core.concurrency import fan_out
 from app.core.deps import get_current_user_id
 from app.core.errors import NotFoundError, ValidationError
+from app.core.geo import covering_cells, zoom_precision
 from app.db.supabase import get_supabase
-from app.schemas.entry import EntryCreate, EntryUpdate, EntryResponse, MOOD_VALUES
+from app.schemas.entry import AutosaveRequest, EntryCreate, EntryUpdate, EntryResponse, MOOD_VALUES
+from app.services import entry_pipeline
+from app.services.analytics_service import day_rollup
+from app.services.autosave import get_autosave
+from app.services.suggest_index import record_tags
+from app.services.trash_purge import retention_cutoff
+from app.services.weather import get_weather_enricher
 
 router = APIRouter()
 
+HEATMAP_MAX_DAYS = 732  # two years, leap-safe
+NEARBY_MAX_RADIUS_KM = 100
+MAP_PINS_MAX_CLUSTERS = 500  # largest clusters first; a viewport at its zoom has far fewer cells
+MEDIA_SUMMARY_COLUMNS = "id, media_type, file_name, mime_type, duration, thumbnail_path, status"
+
 
 def _ensure_mood(mood: str | None) -> None:
     if mood is not None and mood not in MOOD_VALUES:
@@ -28,7 +42,8 @@ async def list_entries(
     user_id: str = Depends(get_current_user_id),
 ):
     supabase = get_supabase()
-    q = supabase.table("journal_entries").select("*, entry_tags(tag)").eq("user_id", user_id).is_("deleted_at", "null")
+    # Tags and media metadata come back embedded in the same request (no per-entry lookups)
+    q = supabase.table("journal_entries").select(f"*, entry_tags(tag), entry_media({MEDIA_SUMMARY_COLUMNS})").eq("user_id", user_id).is_("deleted_at", "null")
     if is_draft is not None:
         q = q.eq("is_draft", is_draft)
     if is_favorite is not None:
@@ -67,7 +82,18 @@ def _row_to_response(row: dict, tags: list[str] | None = None) -> EntryResponse:
         template_id=row.get("template_id"),
         created_at=row["created_at"],
         updated_at=row["updated_at"],
+        deleted_at=row.get("deleted_at"),
+        revision=row.get("revision"),
         tags=tags or [],
+        media=row["entry_media"] if isinstance(row.get("entry_media"), list) else None,
+        reading_time_seconds=row.get("reading_time_seconds"),
+        sentence_count=row.get("sentence_count"),
+        unique_word_count=row.get("unique_word_count"),
+        # JSONB does not keep key order, so re-rank by count
+        keywords=sorted(row["keywords"], key=row["keywords"].get, reverse=True) if row.get("keywords") else None,
+        sentiment_score=row.get("sentiment_score"),
+        inferred_mood=row.get("inferred_mood"),
+        inferred_mood_intensity=row.get("inferred_mood_intensity"),
     )
 
 
@@ -98,6 +124,24 @@ async def calendar_entries(
     return {"entries": r.data or []}
 
 
+@router.get("/heatmap")
+async def heatmap(
+    start: date | None = None,
+    end: date | None = None,
+    user_id: str = Depends(get_current_user_id),
+):
+    """Year-at-a-glance view: per-day counts, dominant mood and word totals in one response."""
+    end = end or date.today()
+    start = start or end - timedelta(days=364)
+    if start > end:
+        raise ValidationError("start must be on or before end", field="start", constraint="range")
+    if (end - start).days >= HEATMAP_MAX_DAYS:
+        raise ValidationError(f"Range may span at most {HEATMAP_MAX_DAYS} days", field="end", constraint="range")
+    # Aggregated per day in SQL: at most one row per day, so the range limit keeps it under the row cap
+    r = get_supabase().rpc("entry_day_rollup", {"p_user_id": user_id, "p_start": str(start), "p_end": str(end)}).execute()
+    return day_rollup(r.data or [], start, end)
+
+
 @router.get("/on-this-day")
 async def on_this_day(
     month: int = Query(..., ge=1, le=12),
@@ -116,10 +160,74 @@ async def on_this_day(
     return {"entries": data}
 
 
+@router.get("/nearby")
+async def nearby_entries(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius: float = Query(1.0, gt=0, le=NEARBY_MAX_RADIUS_KM),  # km
+    limit: int = Query(50, ge=1, le=200),
+    user_id: str = Depends(get_current_user_id),
+):
+    """Entries within `radius` km, nearest first. The geohash index narrows to a few cells; distance, ordering and the limit are applied in SQL."""
+    r = await run_in_threadpool(get_supabase().rpc("nearby_entries", {
+        "p_user_id": user_id,
+        "p_cells": covering_cells(lat, lng, radius),
+        "p_lat": lat,
+        "p_lng": lng,
+        "p_radius_km": radius,
+        "p_limit": limit,
+    }).execute)
+    return {"entries": r.data or []}
+
+
+@router.get("/map-pins")
+async def map_pins(
+    zoom: int = Query(..., ge=0, le=20),
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    user_id: str = Depends(get_current_user_id),
+):
+    """Entries inside the viewport, clustered in SQL per geohash cell sized for the zoom level."""
+    if min_lat > max_lat or min_lng > max_lng:
+        raise ValidationError("Bounding box minimum exceeds maximum", field="min_lat", constraint="range")
+    precision = zoom_precision(zoom)
+    r = get_supabase().rpc("map_clusters", {
+        "p_user_id": user_id,
+        "p_precision": precision,
+        "p_min_lat": min_lat,
+        "p_min_lng": min_lng,
+        "p_max_lat": max_lat,
+        "p_max_lng": max_lng,
+        "p_limit": MAP_PINS_MAX_CLUSTERS,
+    }).execute()
+    return {"precision": precision, "clusters": r.data or []}
+
+
+@router.get("/trash", response_model=list[EntryResponse])
+async def list_trash(
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100),
+    user_id: str = Depends(get_current_user_id),
+):
+    """Deleted entries still inside the retention window, most recently deleted first."""
+    supabase = get_supabase()
+    q = supabase.table("journal_entries").select("*, entry_tags(tag)").eq("user_id", user_id).gte("deleted_at", retention_cutoff().isoformat())
+    r = q.order("deleted_at", desc=True).range((page - 1) * limit, page * limit - 1).execute()
+    out = []
+    for row in (r.data or []):
+        tags = [t["tag"] for t in row.get("entry_tags", [])] if isinstance(row.get("entry_tags"), list) else []
+        out.append(_row_to_response(row, tags))
+    return out
+
+
 @router.get("/{entry_id}", response_model=EntryResponse)
 async def get_entry(entry_id: UUID, user_id: str = Depends(get_current_user_id)):
+    # Pending autosave edits are written first so the read (and its revision) is current
+    await get_autosave().flush(str(entry_id))
     supabase = get_supabase()
-    r = supabase.table("journal_entries").select("*, entry_tags(tag)").eq("id", str(entry_id)).eq("user_id", user_id).is_("deleted_at", "null").execute()
+    r = supabase.table("journal_entries").select(f"*, entry_tags(tag), entry_media({MEDIA_SUMMARY_COLUMNS})").eq("id", str(entry_id)).eq("user_id", user_id).is_("deleted_at", "null").execute()
     if not r.data or len(r.data) == 0:
         raise NotFoundError("Entry not found")
     row = r.data[0]
@@ -133,7 +241,6 @@ async def create_entry(body: EntryCreate, user_id: str = Depends(get_current_use
     supabase = get_supabase()
     entry_date = body.entry_date or date.today()
     entry_time = body.entry_time or time(0, 0, 0)
-    word_count = len(body.content.split())
     payload = {
         "user_id": user_id,
         "title": body.title,
@@ -142,8 +249,6 @@ async def create_entry(body: EntryCreate, user_id: str = Depends(get_current_use
         "mood_intensity": body.mood_intensity,
         "entry_date": str(entry_date),
         "entry_time": str(entry_time),
-        "word_count": word_count,
-        "character_count": len(body.content),
         "is_draft": body.is_draft,
         "is_favorite": body.is_favorite,
         "weather": body.weather,
@@ -151,39 +256,88 @@ async def create_entry(body: EntryCreate, user_id: str = Depends(get_current_use
         "location_lat": body.location_lat,
         "location_lng": body.location_lng,
         "template_id": body.template_id,
+        **entry_pipeline.derive(body.content),
+        **entry_pipeline.location_columns(body.location_lat, body.location_lng),
     }
     r = supabase.table("journal_entries").insert(payload).execute()
     if not r.data or len(r.data) == 0:
         raise HTTPException(status_code=500, detail="Failed to create entry")
     row = r.data[0]
-    if body.tags:
-        for tag in body.tags:
-            supabase.table("entry_tags").insert({"entry_id": row["id"], "tag": tag}).execute()
-    return _row_to_response(row, body.tags or [])
+    tags = list(dict.fromkeys(body.tags or []))
+    if tags:
+        supabase.table("entry_tags").insert([{"entry_id": row["id"], "tag": tag} for tag in tags]).execute()
+        record_tags(user_id, tags)
+    # Weather is filled in the background; providers only know current conditions
+    if body.weather is None and body.location_lat is not None and body.location_lng is not None and entry_date == date.today():
+        get_weather_enricher().enqueue(row["id"], body.location_lat, body.location_lng)
+    return _row_to_response(row, tags)
 
 
 @router.put("/{entry_id}", response_model=EntryResponse)
 async def update_entry(entry_id: UUID, body: EntryUpdate, user_id: str = Depends(get_current_user_id)):
     _ensure_mood(body.mood)
     supabase = get_supabase()
+    get_autosave().forget(str(entry_id))
     payload = body.model_dump(exclude_unset=True)
     if "tags" in payload:
         tags = payload.pop("tags")
     else:
         tags = None
     if "content" in payload and payload["content"] is not None:
-        payload["word_count"] = len(payload["content"].split())
-        payload["character_count"] = len(payload["content"])
+        payload.update(entry_pipeline.derive(payload["content"]))
+    if "location_lat" in payload or "location_lng" in payload:
+        coords = {k: payload[k] for k in ("location_lat", "location_lng") if k in payload}
+        if len(coords) < 2:
+            cur = await run_in_threadpool(
+                supabase.table("journal_entries").select("location_lat, location_lng").eq("id", str(entry_id)).eq("user_id", user_id).execute
+            )
+            coords = {**(cur.data[0] if cur.data else {}), **coords}
+        payload.update(entry_pipeline.location_columns(coords.get("location_lat"), coords.get("location_lng")))
     if payload:
         for k in ("entry_date", "entry_time"):
             if k in payload and payload[k] is not None:
                 payload[k] = str(payload[k])
-        supabase.table("journal_entries").update(payload).eq("id", str(entry_id)).eq("user_id", user_id).execute()
+        q = supabase.table("journal_entries").update(payload)
+    else:
+        q = supabase.table("journal_entries").select("*")
+    # The row write and the reads for the response are independent; tags are only
+    # rewritten once the row write shows the entry exists and the update was valid
+    r, tags_r, media_r = await fan_out(
+        q.eq("id", str(entry_id)).eq("user_id", user_id).is_("deleted_at", "null").execute,
+        supabase.table("entry_tags").select("tag").eq("entry_id", str(entry_id)).execute,
+        supabase.table("entry_media").select(MEDIA_SUMMARY_COLUMNS).eq("entry_id", str(entry_id)).execute,
+    )
+    if not r.data:
+        raise NotFoundError("Entry not found")
+    existing = [t["tag"] for t in (tags_r.data or [])]
     if tags is not None:
-        supabase.table("entry_tags").delete().eq("entry_id", str(entry_id)).execute()
-        for tag in tags:
-            supabase.table("entry_tags").insert({"entry_id": str(entry_id), "tag": tag}).execute()
-    return await get_entry(entry_id, user_id)
+        # Apply only the difference, so unchanged tags keep their rows
+        tags = list(dict.fromkeys(tags))
+        removed = list(set(existing) - set(tags))
+        added = [tag for tag in tags if tag not in existing]
+        calls = []
+        if removed:
+            calls.append(supabase.table("entry_tags").delete().eq("entry_id", str(entry_id)).in_("tag", removed).execute)
+        if added:
+            calls.append(supabase.table("entry_tags").insert([{"entry_id": str(entry_id), "tag": tag} for tag in added]).execute)
+        await fan_out(*calls)
+        record_tags(user_id, added)
+        existing = tags
+    return _row_to_response({**r.data[0], "entry_media": media_r.data or []}, existing)
+
+
+@router.post("/{entry_id}/autosave")
+async def autosave_entry(entry_id: UUID, body: AutosaveRequest, user_id: str = Depends(get_current_user_id)):
+    """Apply text edits against `base_revision`; 409 with the current revision if the entry moved on."""
+    revision = await get_autosave().save(
+        str(entry_id),
+        user_id,
+        body.base_revision,
+        [(e.start, e.end, e.text) for e in body.edits],
+        body.title,
+        "title" in body.model_fields_set,
+    )
+    return {"revision": revision}
 
 
 @router.patch("/{entry_id}", response_model=EntryResponse)
@@ -194,11 +348,20 @@ async def patch_entry(entry_id: UUID, body: EntryUpdate, user_id: str = Depends(
 @router.delete("/{entry_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_entry(entry_id: UUID, user_id: str = Depends(get_current_user_id)):
     supabase = get_supabase()
-    from datetime import datetime, timezone
-    supabase.table("journal_entries").update({"deleted_at": datetime.now(timezone.utc).isoformat()}).eq("id", str(entry_id)).eq("user_id", user_id).execute()
+    supabase.table("journal_entries").update({"deleted_at": datetime.now(timezone.utc).isoformat()}).eq("id", str(entry_id)).eq("user_id", user_id).is_("deleted_at", "null").execute()
     return None
 
 
+@router.post("/{entry_id}/restore", response_model=EntryResponse)
+async def restore_entry(entry_id: UUID, user_id: str = Depends(get_current_user_id)):
+    """Bring an entry back from the trash while it is inside the retention window."""
+    supabase = get_supabase()
+    r = supabase.table("journal_entries").update({"deleted_at": None}).eq("id", str(entry_id)).eq("user_id", user_id).gte("deleted_at", retention_cutoff().isoformat()).execute()
+    if not r.data:
+        raise NotFoundError("Entry not found in trash")
+    return await get_entry(entry_id, user_id)
+
+
 @router.post("/{entry_id}/favorite", response_model=EntryResponse)
 async def add_favorite(entry_id: UUID, user_id: str = Depends(get_current_user_id)):
     supabase = get_supabase()
@@ -0,0 +1,73 @@
+"""User goals CRUD; entry/word goals report counters maintained on entry writes."""
+from datetime import datetime, timezone
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, status
+
+from app.core.deps import get_current_user_id
+from app.core.errors import NotFoundError, ValidationError
+from app.db.supabase import get_supabase
+from app.schemas.goal import GOAL_METRICS, GOAL_PERIODS, GoalCreate, GoalResponse, GoalUpdate
+from app.services.goals import period_window
+
+router = APIRouter()
+
+GOAL_COLUMNS = "id, goal_text, category, notes, metric, target_value, period, period_start, period_end, current_value, progress, completed, completed_at, created_at, updated_at"
+
+
+@router.get("", response_model=list[GoalResponse])
+async def list_goals(user_id: str = Depends(get_current_user_id)):
+    """All goals with their progress in one read; counted goals need no entry scan."""
+    r = get_supabase().table("user_goals").select(GOAL_COLUMNS).eq("user_id", user_id).order("created_at").execute()
+    return r.data or []
+
+
+@router.post("", response_model=GoalResponse, status_code=status.HTTP_201_CREATED)
+async def create_goal(body: GoalCreate, user_id: str = Depends(get_current_user_id)):
+    if body.metric not in GOAL_METRICS:
+        raise ValidationError("Invalid metric", field="metric", constraint="enum")
+    payload = body.model_dump(include={"goal_text", "category", "notes", "metric", "target_value"})
+    payload["user_id"] = user_id
+    if body.metric != "manual":
+        if body.target_value is None:
+            raise ValidationError("target_value is required for counted goals", field="target_value", constraint="required")
+        if body.period not in GOAL_PERIODS:
+            raise ValidationError("Invalid period", field="period", constraint="enum")
+        if body.period == "custom":
+            if body.period_start is None or body.period_end is None or body.period_start > body.period_end:
+                raise ValidationError("Custom period needs period_start <= period_end", field="period_start", constraint="range")
+            start, end = body.period_start, body.period_end
+        else:
+            start, end = period_window(body.period)
+        payload.update({"period": body.period, "period_start": str(start), "period_end": str(end), "target_date": str(end)})
+    r = get_supabase().table("user_goals").insert(payload).execute()
+    return r.data[0]
+
+
+@router.patch("/{goal_id}", response_model=GoalResponse)
+async def update_goal(goal_id: UUID, body: GoalUpdate, user_id: str = Depends(get_current_user_id)):
+    payload = body.model_dump(exclude_unset=True)
+    supabase = get_supabase()
+    if {"progress", "completed"} & payload.keys():
+        cur = supabase.table("user_goals").select("metric").eq("id", str(goal_id)).eq("user_id", user_id).execute()
+        if not cur.data:
+            raise NotFoundError("Goal not found")
+        if cur.data[0]["metric"] != "manual":
+            raise ValidationError("Progress of counted goals is tracked automatically", field="progress", constraint="read_only")
+        if "completed" in payload:
+            payload["completed_at"] = datetime.now(timezone.utc).isoformat() if payload["completed"] else None
+    if not payload:
+        raise ValidationError("Nothing to update", field=None, constraint="empty")
+    payload["updated_at"] = datetime.now(timezone.utc).isoformat()
+    r = supabase.table("user_goals").update(payload).eq("id", str(goal_id)).eq("user_id", user_id).execute()
+    if not r.data:
+        raise NotFoundError("Goal not found")
+    return r.data[0]
+
+
+@router.delete("/{goal_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_goal(goal_id: UUID, user_id: str = Depends(get_current_user_id)):
+    r = get_supabase().table("user_goals").delete().eq("id", str(goal_id)).eq("user_id", user_id).execute()
+    if not r.data:
+        raise NotFoundError("Goal not found")
+    return None
@@ -0,0 +1,117 @@
+"""Entry media: resumable chunked uploads, listing and delete."""
+from uuid import UUID, uuid4
+
+from fastapi import APIRouter, Depends, Query, Request, status
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+
+from app.core.deps import get_current_user_id
+from app.core.errors import NotFoundError, ValidationError
+from app.db.supabase import get_supabase
+from app.services import media_uploads
+from app.services.media_pipeline import MEDIA_BUCKET, get_media_processor, refresh_media_text
+
+router = APIRouter()
+
+MEDIA_COLUMNS = "id, entry_id, media_type, storage_path, file_name, file_size, mime_type, duration, transcription, thumbnail_path, display_order, status, created_at"
+SIGNED_URL_SECONDS = 3600
+
+
+class UploadCreate(BaseModel):
+    media_type: str  # image | audio | video
+    file_name: str
+    mime_type: str = "application/octet-stream"
+    total_size: int = Field(..., gt=0)
+
+
+def _ensure_entry(entry_id: UUID, user_id: str) -> None:
+    r = get_supabase().table("journal_entries").select("id").eq("id", str(entry_id)).eq("user_id", user_id).is_("deleted_at", "null").execute()
+    if not r.data:
+        raise NotFoundError("Entry not found")
+
+
+@router.post("/{entry_id}/media/uploads", status_code=status.HTTP_201_CREATED)
+async def start_upload(entry_id: UUID, body: UploadCreate, user_id: str = Depends(get_current_user_id)):
+    _ensure_entry(entry_id, user_id)
+    session = media_uploads.create(user_id, str(entry_id), body.media_type, body.file_name, body.mime_type, body.total_size)
+    return session.public()
+
+
+@router.get("/{entry_id}/media/uploads/{upload_id}")
+async def upload_status(entry_id: UUID, upload_id: str, user_id: str = Depends(get_current_user_id)):
+    """How many bytes the server has; resume by sending the next chunk at this offset."""
+    return media_uploads.get(upload_id, user_id, str(entry_id)).public()
+
+
+@router.put("/{entry_id}/media/uploads/{upload_id}")
+async def upload_chunk(
+    entry_id: UUID,
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    user_id: str = Depends(get_current_user_id),
+):
+    """Raw chunk bytes as the body, starting at `offset`."""
+    session = media_uploads.get(upload_id, user_id, str(entry_id))
+    await media_uploads.append(session, offset, request.stream())
+    return session.public()
+
+
+@router.post("/{entry_id}/media/uploads/{upload_id}/complete", status_code=status.HTTP_201_CREATED)
+async def complete_upload(entry_id: UUID, upload_id: str, user_id: str = Depends(get_current_user_id)):
+    session = media_uploads.get(upload_id, user_id, str(entry_id))
+    async with session.lock:
+        # Re-check under the lock: a concurrent completion may have consumed the session
+        media_uploads.get(upload_id, user_id, str(entry_id))
+        if session.received != session.total_size:
+            raise ValidationError("Upload incomplete", field="total_size", constraint="incomplete")
+        supabase = get_supabase()
+        storage_path = f"{user_id}/{entry_id}/{uuid4().hex}_{session.file_name}"
+        await run_in_threadpool(
+            supabase.storage.from_(MEDIA_BUCKET).upload, storage_path, session.path, {"content-type": session.mime_type}
+        )
+        r = supabase.table("entry_media").insert({
+            "entry_id": str(entry_id),
+            "media_type": session.media_type,
+            "storage_path": storage_path,
+            "storage_bucket": MEDIA_BUCKET,
+            "file_name": session.file_name,
+            "file_size": session.total_size,
+            "mime_type": session.mime_type,
+            "status": "pending",
+        }).execute()
+        media_uploads.discard(session)
+    row = r.data[0]
+    get_media_processor().enqueue(row["id"])
+    return row
+
+
+@router.get("/{entry_id}/media")
+async def list_media(entry_id: UUID, user_id: str = Depends(get_current_user_id)):
+    _ensure_entry(entry_id, user_id)
+    supabase = get_supabase()
+    r = supabase.table("entry_media").select(MEDIA_COLUMNS).eq("entry_id", str(entry_id)).order("display_order").execute()
+    media = r.data or []
+    paths = [p for m in media for p in (m["storage_path"], m.get("thumbnail_path")) if p]
+    if paths:
+        # One signing call for every file and thumbnail on the entry
+        signed = await run_in_threadpool(supabase.storage.from_(MEDIA_BUCKET).create_signed_urls, paths, SIGNED_URL_SECONDS)
+        urls = {s.get("path"): s.get("signedURL") for s in signed}
+        for m in media:
+            m["url"] = urls.get(m["storage_path"])
+            m["thumbnail_url"] = urls.get(m.get("thumbnail_path"))
+    return {"media": media}
+
+
+@router.delete("/{entry_id}/media/{media_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_media(entry_id: UUID, media_id: UUID, user_id: str = Depends(get_current_user_id)):
+    _ensure_entry(entry_id, user_id)
+    supabase = get_supabase()
+    r = supabase.table("entry_media").delete().eq("id", str(media_id)).eq("entry_id", str(entry_id)).execute()
+    if not r.data:
+        raise NotFoundError("Media not found")
+    row = r.data[0]
+    supabase.storage.from_(row.get("storage_bucket") or MEDIA_BUCKET).remove([p for p in (row["storage_path"], row.get("thumbnail_path")) if p])
+    if row.get("transcription"):
+        refresh_media_text(str(entry_id))
+    return None
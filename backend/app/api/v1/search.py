@@ -4,6 +4,8 @@ from fastapi import APIRouter, Depends, Query
 from app.core.deps import get_current_user_id
 from app.db.supabase import get_supabase
 from app.schemas.entry import EntryResponse
+from app.services.suggest_index import get_index, record_query
+from app.services.write_behind import get_write_behind
 
 router = APIRouter()
 
@@ -18,6 +20,7 @@ def _entry_response(row: dict, tags: list[str]) -> dict:
         "entry_date": str(row.get("entry_date", "")),
         "entry_time": str(row.get("entry_time", ""))[:8],
         "word_count": row.get("word_count", 0),
+        "reading_time_seconds": row.get("reading_time_seconds"),
         "is_draft": row.get("is_draft", False),
         "is_favorite": row.get("is_favorite", False),
         "tags": tags,
@@ -39,7 +42,9 @@ async def search(
     # Use Supabase full-text search if search_vector column exists
     query = supabase.table("journal_entries").select("*, entry_tags(tag)").eq("user_id", user_id).is_("deleted_at", "null").eq("is_draft", False)
     if q:
-        query = query.ilike("content", f"%{q}%")
+        # Match entry text or transcriptions of its audio (copied to media_text by the media pipeline)
+        pattern = q.replace("\\", "\\\\").replace('"', '\\"')
+        query = query.or_(f'content.ilike."%{pattern}%",media_text.ilike."%{pattern}%"')
     if mood:
         query = query.eq("mood", mood)
     query = query.order("entry_date", desc=True).order("entry_time", desc=True).range((page - 1) * limit, page * limit - 1)
@@ -52,6 +57,10 @@ async def search(
             if wanted and not any(t in tag_list for t in wanted):
                 continue
         results.append(_entry_response(row, tag_list))
+    if q.strip() and page == 1:
+        # One history row per search, not per page; browsing without a query is not a search
+        record_query(user_id, q)
+        get_write_behind().submit("search_history", {"user_id": user_id, "query": q, "result_count": len(results)})
     return {"results": results, "query": q, "page": page, "limit": limit}
 
 
@@ -62,8 +71,6 @@ async def suggestions(
 ):
     if not q or len(q) < 2:
         return {"suggestions": []}
-    supabase = get_supabase()
-    # Suggest tags or recent queries
-    r = supabase.table("tags").select("tag").eq("user_id", user_id).ilike("tag", f"%{q}%").limit(10).execute()
-    tags = [row["tag"] for row in (r.data or [])]
-    return {"suggestions": tags}
+    # Tags and past queries ranked by frequency and recency, from the in-memory prefix index
+    idx = await get_index(user_id)
+    return {"suggestions": [s["text"] for s in idx.lookup(q, limit=10)]}
@@ -0,0 +1,68 @@
+"""Tag listing and bulk rename/merge/delete across all of a user's entries.
+
+Counts come from `tags`, kept in step with `entry_tags` by statement-level triggers;
+the bulk operations are single SQL functions, so a rename touches every entry in one
+round trip instead of one entry update each.
+"""
+from fastapi import APIRouter, Depends, Query
+
+from app.core.deps import get_current_user_id
+from app.core.errors import NotFoundError, ValidationError
+from app.db.supabase import get_supabase
+from app.schemas.tag import TagChangeResponse, TagMerge, TagRename, TagResponse
+from app.services.suggest_index import forget_tags, record_tags
+
+router = APIRouter()
+
+
+def _clean(tag: str, field: str) -> str:
+    tag = tag.strip()
+    if not tag:
+        raise ValidationError("Tag cannot be empty", field=field, constraint="min_length")
+    return tag
+
+
+def _merge(user_id: str, sources: list[str], target: str) -> int:
+    r = get_supabase().rpc("merge_tags", {"p_user_id": user_id, "p_sources": sources, "p_target": target}).execute()
+    result = (r.data or [{}])[0]
+    if not result.get("entries_updated"):
+        raise NotFoundError("Tag not found")
+    forget_tags(user_id, [s for s in sources if s != target])
+    if result.get("target_added"):
+        # Only entries that did not already carry the target add to its count
+        record_tags(user_id, [target], count=result["target_added"])
+    return result["entries_updated"]
+
+
+@router.get("", response_model=list[TagResponse])
+async def list_tags(limit: int = Query(200, ge=1, le=1000), user_id: str = Depends(get_current_user_id)):
+    """The user's tags by usage, read from the maintained counters."""
+    r = get_supabase().table("tags").select("tag, usage_count, last_used_at").eq("user_id", user_id).order("usage_count", desc=True).order("tag").limit(limit).execute()
+    return r.data or []
+
+
+@router.post("/rename", response_model=TagChangeResponse)
+async def rename_tag(body: TagRename, user_id: str = Depends(get_current_user_id)):
+    tag, new_tag = _clean(body.tag, "tag"), _clean(body.new_tag, "new_tag")
+    if tag == new_tag:
+        raise ValidationError("new_tag must differ from tag", field="new_tag", constraint="distinct")
+    return {"entries_updated": _merge(user_id, [tag], new_tag)}
+
+
+@router.post("/merge", response_model=TagChangeResponse)
+async def merge_tags(body: TagMerge, user_id: str = Depends(get_current_user_id)):
+    target = _clean(body.target, "target")
+    sources = sorted({_clean(s, "sources") for s in body.sources} - {target})
+    if not sources:
+        raise ValidationError("sources must include a tag other than target", field="sources", constraint="distinct")
+    return {"entries_updated": _merge(user_id, sources, target)}
+
+
+@router.delete("/{tag}", response_model=TagChangeResponse)
+async def delete_tag(tag: str, user_id: str = Depends(get_current_user_id)):
+    tag = _clean(tag, "tag")
+    r = get_supabase().rpc("delete_tags", {"p_user_id": user_id, "p_tags": [tag]}).execute()
+    if not r.data:
+        raise NotFoundError("Tag not found")
+    forget_tags(user_id, [tag])
+    return {"entries_updated": r.data}
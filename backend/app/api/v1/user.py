@@ -1,9 +1,16 @@
 """User profile and preferences endpoints."""
-from fastapi import APIRouter, Depends
-from fastapi import UploadFile
+import hashlib
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+from fastapi import APIRouter, Depends, Request
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile as StarletteUploadFile
+
+from app.config import get_settings
+from app.core.concurrency import fan_out, run_in_process
 from app.core.deps import get_current_user_id
-from app.core.errors import NotFoundError
+from app.core.errors import NotFoundError, ValidationError
+from app.core.uploads import check_content_length, iter_upload, read_capped
 from app.db.supabase import get_supabase
 from app.schemas.user import (
     UserProfileResponse,
@@ -12,6 +19,8 @@ from app.schemas.user import (
     UserPreferencesUpdate,
     UserStatsResponse,
 )
+from app.services.media_processing import square_variants
+from app.services.reminders import get_reminder_scheduler
 
 router = APIRouter()
 
@@ -103,20 +112,46 @@ async def update_profile(
 
 
 @router.patch("/avatar")
-async def update_avatar(
-    file: UploadFile | None = None,
-    user_id: str = Depends(get_current_user_id),
-):
-    if not file or not file.filename:
+async def update_avatar(request: Request, user_id: str = Depends(get_current_user_id)):
+    """Multipart `file` field, or the raw image as the body (streamed). Stored as square JPEGs per size."""
+    settings = get_settings()
+    check_content_length(request, settings.avatar_max_bytes)
+    if request.headers.get("content-type", "").startswith("multipart/"):
+        if "content-length" not in request.headers:
+            raise ValidationError("Content-Length required for multipart uploads", field="file", constraint="max_size")
+        form = await request.form(max_files=1, max_fields=5)
+        file = form.get("file")
+        if not isinstance(file, StarletteUploadFile) or not file.filename:
+            return {"message": "No file provided"}
+        content = await read_capped(iter_upload(file), settings.avatar_max_bytes)
+    else:
+        content = await read_capped(request.stream(), settings.avatar_max_bytes)
+    if not content:
         return {"message": "No file provided"}
-    # Upload to Supabase Storage and set avatar_url on users
+    digest = hashlib.sha256(content).hexdigest()[:32]
+    try:
+        variants = await run_in_process(square_variants, content, settings.avatar_sizes)
+    except ValueError:
+        raise ValidationError("File is not a supported image", field="file", constraint="image")
     supabase = get_supabase()
-    content = await file.read()
-    path = f"avatars/{user_id}/{file.filename}"
-    supabase.storage.from_("avatars").upload(path, content, file_options={"content-type": file.content_type or "image/jpeg"})
-    url = supabase.storage.from_("avatars").get_public_url(path)
+    bucket = supabase.storage.from_("avatars")
+    folder = f"avatars/{user_id}"
+    paths = {size: f"{folder}/{digest}_{size}.jpg" for size in variants}
+
+    def store() -> None:
+        # Content-hash names are immutable, so the CDN may cache them forever; re-uploads dedupe via upsert
+        for size, data in variants.items():
+            bucket.upload(paths[size], data, file_options={"content-type": "image/jpeg", "cache-control": "31536000", "upsert": "true"})
+        stale = [f"{folder}/{f['name']}" for f in (bucket.list(folder) or []) if not f["name"].startswith(digest)]
+        if stale:
+            bucket.remove(stale)
+
+    await run_in_threadpool(store)
+    urls = {str(size): bucket.get_public_url(path) for size, path in paths.items()}
+    default_size = 256 if 256 in variants else max(variants)
+    url = urls[str(default_size)]
     supabase.table("users").update({"avatar_url": url}).eq("id", user_id).execute()
-    return {"avatar_url": url}
+    return {"avatar_url": url, "sizes": urls}
 
 
 @router.get("/preferences", response_model=UserPreferencesResponse)
@@ -132,6 +167,7 @@ async def get_preferences(user_id: str = Depends(get_current_user_id)):
             reminder_enabled=True,
             reminder_time="21:00",
             reminder_days=["mon", "tue", "wed", "thu", "fri", "sat", "sun"],
+            timezone="UTC",
             auto_save_interval=30,
             show_word_count=True,
             ai_enabled=True,
@@ -146,6 +182,7 @@ async def get_preferences(user_id: str = Depends(get_current_user_id)):
         reminder_enabled=row.get("reminder_enabled", True),
         reminder_time=row.get("reminder_time"),
         reminder_days=row.get("reminder_days"),
+        timezone=row.get("timezone") or "UTC",
         auto_save_interval=row.get("auto_save_interval", 30),
         show_word_count=row.get("show_word_count", True),
         ai_enabled=row.get("ai_enabled", True),
@@ -161,23 +198,31 @@ async def update_preferences(
 ):
     supabase = get_supabase()
     payload = body.model_dump(exclude_unset=True)
+    if payload.get("timezone"):
+        try:
+            ZoneInfo(payload["timezone"])
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValidationError("Unknown time zone", field="timezone", constraint="iana")
     if payload:
         supabase.table("user_preferences").upsert({
             "user_id": user_id,
             **payload,
         }, on_conflict="user_id").execute()
+        if get_settings().reminders_enabled and payload.keys() & {"reminder_enabled", "reminder_time", "reminder_days", "timezone"}:
+            get_reminder_scheduler().upsert(user_id, _prefs_row(user_id))
     return await get_preferences(user_id)
 
 
 @router.get("/stats", response_model=UserStatsResponse)
 async def get_stats(user_id: str = Depends(get_current_user_id)):
     supabase = get_supabase()
-    # Entries count (non-draft, not deleted)
-    r = supabase.table("journal_entries").select("id, word_count, entry_date", count="exact").eq("user_id", user_id).is_("deleted_at", "null").eq("is_draft", False).execute()
+    # Entries count (non-draft, not deleted) and streaks are independent: fetch together
+    r, streak_r = await fan_out(
+        supabase.table("journal_entries").select("id, word_count, entry_date", count="exact").eq("user_id", user_id).is_("deleted_at", "null").eq("is_draft", False).execute,
+        supabase.table("streaks").select("*").eq("user_id", user_id).execute,
+    )
     total_entries = r.count or 0
     total_words = sum(row.get("word_count", 0) for row in (r.data or []))
-    # Streaks
-    streak_r = supabase.table("streaks").select("*").eq("user_id", user_id).execute()
     current_streak = 0
     longest_streak = 0
     if streak_r.data and len(streak_r.data) > 0:
@@ -21,6 +21,8 @@ class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
+    token_cache_max_entries: int = 10000
+    revocation_sync_seconds: float = 10.0  # how soon other workers' logouts/revocations apply here
 
     # AI: Groq only (free tier at console.groq.com)
     groq_api_key: str | None = Field(None, env="GROQ_API_KEY")
@@ -30,11 +32,110 @@ class Settings(BaseSettings):
     openweather_api_key: str | None = Field(None, env="OPENWEATHER_API_KEY")
     sentry_dsn: str | None = Field(None, env="SENTRY_DSN")
 
+    # Weather enrichment (provider lookups cached per geohash cell and hour)
+    weather_provider: str = Field("stub", env="WEATHER_PROVIDER")  # stub | openweather
+    weather_geohash_precision: int = 5
+    weather_cache_max_entries: int = 5000
+    weather_batch_size: int = 50
+    weather_batch_window_seconds: float = 0.5
+    weather_fetch_concurrency: int = 4
+
+    # AI chat SSE: delta coalescing, resume window and heartbeats
+    chat_frame_max_chars: int = 200
+    chat_frame_max_delay_seconds: float = 0.05
+    chat_resume_window_seconds: int = 120
+    sse_heartbeat_seconds: float = 15.0
+
+    # Templates / prompts catalog snapshots
+    catalog_refresh_seconds: float = 60.0
+
+    # Draft autosave: coalesce rapid saves per entry into one write
+    autosave_debounce_seconds: float = 2.0
+    autosave_max_delay_seconds: float = 10.0
+
+    # Avatars
+    avatar_max_bytes: int = 5 * 1024 * 1024
+    avatar_sizes: list[int] = [64, 256, 512]
+
+    # Entry media
+    media_max_bytes: int = 100 * 1024 * 1024
+    media_upload_dir: str = "/tmp/ai-journal-uploads"
+    media_upload_ttl_seconds: int = 24 * 3600
+    media_workers: int = 2
+    transcription_backend: str = Field("stub", env="TRANSCRIPTION_BACKEND")  # stub | groq
+    groq_transcription_model: str = "whisper-large-v3"
+
+    # Admission control: per route class concurrency, queue depth and max queue wait
+    admission_enabled: bool = Field(True, env="ADMISSION_ENABLED")
+    admission_read_limit: int = 64
+    admission_read_queue: int = 128
+    admission_read_queue_timeout: float = 1.0
+    admission_write_limit: int = 32
+    admission_write_queue: int = 64
+    admission_write_queue_timeout: float = 2.0
+    admission_ai_limit: int = 8
+    admission_ai_queue: int = 8
+    admission_ai_queue_timeout: float = 0.5
+    admission_retry_after_seconds: int = 1
+
+    # Response compression (brotli used when the optional package is installed)
+    compression_min_bytes: int = 500
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+
+    # Diagnostics: sampled request profiling and event-loop lag monitoring
+    profiling_sample_rate: float = 0.0
+    profiling_token: str | None = Field(None, env="PROFILING_TOKEN")  # X-Profile value that forces a profile; also unlocks /health/details
+    profiling_interval_ms: float = 5.0
+    profiling_output_dir: str = "/tmp/ai-journal-profiles"
+    profiling_max_files: int = 200  # oldest profiles are deleted beyond this
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval_seconds: float = 0.1
+    loop_lag_threshold_ms: float = 100.0
+
     # Rate limiting
     rate_limit_requests: int = 100
     rate_limit_window_seconds: int = 60
     ai_rate_limit_per_user_per_day: int = 50
 
+    # Max independent data calls a single request may run concurrently
+    fanout_max_concurrency: int = 4
+    # Worker processes for CPU-bound media work
+    process_pool_workers: int = 2
+
+    # Autocomplete prefix index (per-user, in-process)
+    suggest_index_max_users: int = 5000
+    suggest_index_ttl_seconds: int = 600
+
+    # Write-behind queue for non-critical writes
+    write_behind_max_buffer: int = 10000
+    write_behind_batch_size: int = 200
+    write_behind_flush_interval_seconds: float = 1.0
+    write_behind_overflow: str = "drop_oldest"  # drop_oldest | drop_newest
+
+    # Background weekly/monthly AI insights
+    insights_enabled: bool = Field(False, env="INSIGHTS_ENABLED")
+    insights_interval_seconds: int = 3600
+    insights_batch_size: int = 100
+    insights_workers: int = 4
+    insights_llm_requests_per_minute: int = 30
+
+    # Reminder notifications (a job lease keeps delivery to one worker at a time)
+    reminders_enabled: bool = Field(False, env="REMINDERS_ENABLED")
+    reminders_tick_seconds: float = 30.0
+    reminders_sync_seconds: float = 60.0
+    push_backend: str = Field("log", env="PUSH_BACKEND")
+
+    # Trash: deleted entries can be restored for this long, then the purge job removes them
+    trash_retention_days: int = 30
+    trash_purge_enabled: bool = Field(False, env="TRASH_PURGE_ENABLED")
+    trash_purge_interval_seconds: int = 3600
+    trash_purge_batch_size: int = 200
+
+    # POST /analytics/backfill: runs in the background, bounded per request
+    backfill_batch_size: int = 200
+    backfill_max_batches: int = 50  # per pass; a later request picks up what's left
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
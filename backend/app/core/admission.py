@@ -0,0 +1,149 @@
+"""Admission control: per-route-class concurrency limits with bounded, short queues.
+
+Requests are classed as `read` (GET/HEAD), `write` (other methods) or `ai` (LLM calls).
+Each class admits up to its limit concurrently; beyond that, up to `queue` requests wait
+at most `queue_timeout` seconds for a slot and everything else is shed at once with a
+503, so a spike costs the excess requests a fast retry instead of slowing everyone down.
+AI calls are also shed while interactive reads are queueing, so reads keep priority.
+"""
+import asyncio
+import json
+from collections import deque
+from functools import lru_cache
+
+from app.config import get_settings
+from app.core.errors import APIErrorResponse, ErrorBody, ErrorCode
+
+AI_PATHS = ("/ai/chat", "/ai/generate-prompt", "/ai/improve-text")
+AI_STREAM_PREFIX = "/ai/chat/streams/"  # GET resumes a chat stream; it holds the connection like the POST
+EXEMPT_PATHS = ("/health", "/health/details", "/ready", "/docs", "/redoc", "/openapi.json")
+
+
+class Gate:
+    def __init__(self, limit: int, queue: int, queue_timeout: float):
+        self.limit = limit
+        self.queue = queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.shed = 0
+        self.avg_queue_ms = 0.0  # EWMA over admitted requests
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self._observe(0.0)
+            return True
+        if len(self._waiters) >= self.queue:
+            self.shed += 1
+            return False
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._waiters.append(fut)
+        start = loop.time()
+        try:
+            await asyncio.wait_for(fut, self.queue_timeout)
+        except BaseException as e:
+            if fut.done() and not fut.cancelled():
+                self.release()  # a slot was handed over just as we gave up
+            try:
+                self._waiters.remove(fut)
+            except ValueError:
+                pass
+            if isinstance(e, asyncio.TimeoutError):
+                self.shed += 1
+                return False
+            raise
+        self._observe((loop.time() - start) * 1000)
+        return True
+
+    def release(self) -> None:
+        # Hand the slot straight to the oldest live waiter, else free it
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _observe(self, queue_ms: float) -> None:
+        self.avg_queue_ms += 0.1 * (queue_ms - self.avg_queue_ms)
+
+    def stats(self) -> dict:
+        return {"in_flight": self.in_flight, "waiting": self.waiting, "shed": self.shed, "avg_queue_ms": round(self.avg_queue_ms, 1)}
+
+
+def route_class(method: str, path: str) -> str:
+    if method == "POST" and path.endswith(AI_PATHS):
+        return "ai"
+    if method == "GET" and AI_STREAM_PREFIX in path:
+        return "ai"
+    return "read" if method in ("GET", "HEAD") else "write"
+
+
+def _shed_response_body() -> bytes:
+    return json.dumps(APIErrorResponse(error=ErrorBody(
+        code=ErrorCode.SERVICE_UNAVAILABLE,
+        message="Server is busy, please retry shortly",
+    )).model_dump()).encode()
+
+
+@lru_cache
+def get_gates() -> dict[str, Gate]:
+    settings = get_settings()
+    return {
+        "read": Gate(settings.admission_read_limit, settings.admission_read_queue, settings.admission_read_queue_timeout),
+        "write": Gate(settings.admission_write_limit, settings.admission_write_queue, settings.admission_write_queue_timeout),
+        "ai": Gate(settings.admission_ai_limit, settings.admission_ai_queue, settings.admission_ai_queue_timeout),
+    }
+
+
+def admission_stats() -> dict:
+    return {name: gate.stats() for name, gate in get_gates().items()}
+
+
+class AdmissionMiddleware:
+    """Pure ASGI so the slot is held until the response (including streams) has been sent."""
+
+    def __init__(self, app):
+        self.app = app
+        settings = get_settings()
+        self.enabled = settings.admission_enabled
+        self.gates = get_gates()
+        self.retry_after = str(settings.admission_retry_after_seconds)
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["path"] in EXEMPT_PATHS or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        cls = route_class(scope["method"], scope["path"])
+        gate = self.gates[cls]
+        if cls == "ai" and self.gates["read"].waiting:
+            gate.shed += 1
+            admitted = False
+        else:
+            admitted = await gate.acquire()
+        if not admitted:
+            await self._reject(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+    async def _reject(self, send) -> None:
+        body = _shed_response_body()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", self.retry_after.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
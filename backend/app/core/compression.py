@@ -0,0 +1,143 @@
+"""Response compression negotiated from Accept-Encoding: brotli (if installed) or gzip.
+
+Complete bodies below `compression_min_bytes` go out as-is. Every response of a
+compressible type carries `Vary: Accept-Encoding` (merged into any existing Vary). Streamed bodies are
+compressed incrementally without buffering the whole response; for SSE the compressor
+is flushed after every chunk, so each event (and heartbeat) reaches the client as soon
+as it is produced instead of waiting for the compressor to fill a block.
+"""
+import zlib
+
+from app.config import get_settings
+
+try:
+    import brotli
+except ImportError:  # optional dependency; gzip only without it
+    brotli = None
+
+COMPRESSIBLE_TYPES = (b"application/json", b"text/", b"application/javascript", b"image/svg+xml")
+SSE_TYPE = b"text/event-stream"
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """Best supported coding the client accepts (q > 0), preferring br over gzip."""
+    offered: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip().lower()] = q
+    for coding in (("br",) if brotli is not None else ()) + ("gzip",):
+        if offered.get(coding, offered.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+class _Encoder:
+    def __init__(self, coding: str, gzip_level: int, brotli_quality: int):
+        if coding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+            self._z = None
+        else:
+            self._br = None
+            self._z = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        if self._br is not None:
+            out = self._br.process(data)
+            return out + self._br.flush() if flush else out
+        out = self._z.compress(data)
+        return out + self._z.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        if self._br is not None:
+            return self._br.finish()
+        return self._z.flush(zlib.Z_FINISH)
+
+
+def _with_vary(headers: list[tuple[bytes, bytes]]) -> list[tuple[bytes, bytes]]:
+    """Headers with Accept-Encoding merged into a single Vary header."""
+    for i, (k, v) in enumerate(headers):
+        if k.lower() == b"vary":
+            tokens = [t.strip().lower() for t in v.split(b",")]
+            if b"accept-encoding" in tokens or b"*" in tokens:
+                return headers
+            return [*headers[:i], (k, v + b", Accept-Encoding"), *headers[i + 1:]]
+    return [*headers, (b"vary", b"Accept-Encoding")]
+
+
+class CompressionMiddleware:
+    def __init__(self, app):
+        self.app = app
+        settings = get_settings()
+        self.min_bytes = settings.compression_min_bytes
+        self.gzip_level = settings.compression_gzip_level
+        self.brotli_quality = settings.compression_brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"accept-encoding"), "")
+        coding = choose_encoding(accept) if accept else None
+
+        start_message: dict | None = None
+        encoder: _Encoder | None = None
+        passthrough = False
+        is_sse = False
+
+        async def wrapped_send(message):
+            nonlocal start_message, encoder, passthrough, is_sse
+            if message["type"] == "http.response.start":
+                headers = dict((k.lower(), v) for k, v in message.get("headers", []))
+                content_type = headers.get(b"content-type", b"")
+                compressible = content_type.startswith(COMPRESSIBLE_TYPES)
+                if compressible:
+                    # Caches must key on Accept-Encoding whether or not this copy is compressed
+                    message = {**message, "headers": _with_vary(list(message.get("headers", [])))}
+                passthrough = (
+                    coding is None
+                    or b"content-encoding" in headers
+                    or message["status"] in (204, 304)
+                    or not compressible
+                )
+                is_sse = content_type.startswith(SSE_TYPE)
+                start_message = message
+                if passthrough:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if encoder is None:
+                # First body chunk decides: small complete bodies are sent uncompressed
+                if not more and len(body) < self.min_bytes:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                encoder = _Encoder(coding, self.gzip_level, self.brotli_quality)
+                headers = [(k, v) for k, v in start_message.get("headers", []) if k.lower() not in (b"content-length", b"content-encoding")]
+                headers.append((b"content-encoding", coding.encode()))
+                if not more:
+                    data = encoder.compress(body) + encoder.finish()
+                    headers.append((b"content-length", str(len(data)).encode()))
+                    await send({**start_message, "headers": headers})
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                await send({**start_message, "headers": headers})
+            data = encoder.compress(body, flush=is_sse)
+            if not more:
+                data += encoder.finish()
+            if data or not more:
+                await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, wrapped_send)
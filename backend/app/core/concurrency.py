@@ -0,0 +1,50 @@
+"""Concurrent fan-out for independent blocking data calls, and a process pool for CPU-bound work."""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+
+
+async def fan_out(*calls: Callable[[], Any], limit: int | None = None) -> list[Any]:
+    """Run zero-arg blocking calls (e.g. Supabase `.execute()`) concurrently in the threadpool.
+
+    Results are returned in call order. At most `limit` calls run at once (defaults to
+    `fanout_max_concurrency`). On the first failure, calls that have not started are
+    cancelled and the original exception is re-raised.
+    """
+    sem = asyncio.Semaphore(limit or get_settings().fanout_max_concurrency)
+
+    async def run(call: Callable[[], Any]) -> Any:
+        async with sem:
+            return await run_in_threadpool(call)
+
+    tasks = [asyncio.ensure_future(run(c)) for c in calls]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        # Calls already running in a thread cannot be interrupted; wait so none outlive the request.
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+_process_pool: ProcessPoolExecutor | None = None
+
+
+async def run_in_process(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a picklable, CPU-bound function (image decoding, resizing) off the event loop."""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=get_settings().process_pool_workers)
+    return await asyncio.get_running_loop().run_in_executor(_process_pool, fn, *args)
+
+
+def shutdown_process_pool() -> None:
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
@@ -5,33 +5,38 @@ from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer, OAuth2PasswordBearer
 
 from app.core.errors import APIErrorResponse, ErrorBody, ErrorCode, UnauthorizedError
-from app.core.security import decode_token
+from app.core.token_store import verify_token
 
 security = HTTPBearer(auto_error=False)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
 
 
-async def get_current_user_id(
+async def get_current_token_payload(
     credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(security)],
-) -> str:
+) -> dict:
     if not credentials:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"error": ErrorBody(code=ErrorCode.UNAUTHORIZED, message="Authentication required")},
         )
-    payload = decode_token(credentials.credentials)
-    if not payload or payload.get("type") != "access":
+    payload = verify_token(credentials.credentials, "access")
+    if not payload:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"error": ErrorBody(code=ErrorCode.UNAUTHORIZED, message="Invalid or expired token")},
         )
-    sub = payload.get("sub")
-    if not sub:
+    if not payload.get("sub"):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"error": ErrorBody(code=ErrorCode.UNAUTHORIZED, message="Invalid token")},
         )
-    return sub
+    return payload
+
+
+async def get_current_user_id(
+    payload: Annotated[dict, Depends(get_current_token_payload)],
+) -> str:
+    return payload["sub"]
 
 
 # Optional auth (for routes that work with or without user)
@@ -40,7 +45,7 @@ async def get_optional_user_id(
 ) -> str | None:
     if not credentials:
         return None
-    payload = decode_token(credentials.credentials)
-    if not payload or payload.get("type") != "access":
+    payload = verify_token(credentials.credentials, "access")
+    if not payload:
         return None
     return payload.get("sub")
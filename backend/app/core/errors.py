@@ -86,3 +86,8 @@ class RateLimitError(AppException):
 class AIServiceError(AppException):
     def __init__(self, message: str = "AI service temporarily unavailable"):
         super().__init__(ErrorCode.AI_SERVICE_ERROR, message)
+
+
+class ServiceUnavailableError(AppException):
+    def __init__(self, message: str = "Service temporarily unavailable"):
+        super().__init__(ErrorCode.SERVICE_UNAVAILABLE, message)
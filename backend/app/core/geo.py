@@ -0,0 +1,79 @@
+"""Geohash helpers: nearby coordinates share a prefix, so a cell id works as a cache or index key."""
+import math
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+def geohash_encode(lat: float, lng: float, precision: int = 7) -> str:
+    """Standard base32 geohash; precision 5 is a ~5 km cell, 7 is ~150 m."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    n_bits = 0
+    even = True  # bits alternate longitude, latitude
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                bits = bits << 1 | 1
+                lng_lo = mid
+            else:
+                bits <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                bits = bits << 1 | 1
+                lat_lo = mid
+            else:
+                bits <<= 1
+                lat_hi = mid
+        even = not even
+        n_bits += 1
+        if n_bits == 5:
+            chars.append(_BASE32[bits])
+            bits = n_bits = 0
+    return "".join(chars)
+
+
+def cell_span(precision: int) -> tuple[float, float]:
+    """(lat degrees, lng degrees) covered by one cell at `precision`."""
+    bits = precision * 5
+    lng_bits = (bits + 1) // 2
+    return 180.0 / (1 << (bits - lng_bits)), 360.0 / (1 << lng_bits)
+
+
+def covering_cells(lat: float, lng: float, radius_km: float, max_precision: int = 9) -> list[str]:
+    """The cell containing the point plus its neighbours, at the finest precision whose cells
+    are at least `radius_km` across; together they cover the whole circle."""
+    dlat = radius_km / KM_PER_DEGREE
+    dlng = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    precision = 1
+    while precision < max_precision:
+        lat_span, lng_span = cell_span(precision + 1)
+        if lat_span < dlat or lng_span < dlng:
+            break
+        precision += 1
+    lat_span, lng_span = cell_span(precision)
+    cells = set()
+    for i in (-1, 0, 1):
+        for j in (-1, 0, 1):
+            clat = min(max(lat + i * lat_span, -90.0), 90.0)
+            clng = (lng + j * lng_span + 180.0) % 360.0 - 180.0
+            cells.add(geohash_encode(clat, clng, precision))
+    return sorted(cells)
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def zoom_precision(zoom: int) -> int:
+    """Geohash precision whose cells are roughly a map pin's width at a web-map zoom level."""
+    return max(1, min(9, round(2 * (zoom + 2) / 5)))
@@ -0,0 +1,217 @@
+"""Production diagnostics: an opt-in sampling profiler and an event-loop lag monitor.
+
+The profiler samples every thread's stack (the event loop and the threadpool running
+blocking Supabase/Groq calls) at `profiling_interval_ms` while at least one profiled
+request is in flight; nothing runs otherwise. A request is profiled when it wins the
+`profiling_sample_rate` draw or carries `X-Profile: <PROFILING_TOKEN>`. Samples are
+written as folded stacks (`frame;frame;frame count`, readable by flamegraph.pl and
+speedscope) to `profiling_output_dir`, and the file id is returned in `X-Profile-Id`;
+only the newest `profiling_max_files` profiles are kept.
+Other requests running concurrently show up in the same samples.
+
+The lag monitor ticks on the loop; a watchdog thread notices when a tick is late,
+captures what the loop thread is executing at that moment and logs it, which points
+straight at the blocking call.
+"""
+import asyncio
+import logging
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from functools import lru_cache
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+MAX_DEPTH = 128
+_IDLE = {("threading.py", "wait"), ("queue.py", "get"), ("thread.py", "_worker"), ("selectors.py", "select")}
+
+
+def _fold(frame) -> str | None:
+    """Root-first `file:function` frames joined by ';'; None for threads parked idle."""
+    leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+    if leaf in _IDLE:
+        return None
+    parts = []
+    while frame is not None and len(parts) < MAX_DEPTH:
+        parts.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_qualname}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+class StackSampler:
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._sessions: dict[str, Counter] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def begin(self) -> str:
+        profile_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{secrets.token_hex(4)}"
+        with self._lock:
+            self._sessions[profile_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+        return profile_id
+
+    def end(self, profile_id: str) -> Counter:
+        with self._lock:
+            return self._sessions.pop(profile_id, Counter())
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        names = {}
+        while True:
+            with self._lock:
+                if not self._sessions:
+                    self._thread = None
+                    return
+                sessions = list(self._sessions.values())
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = _fold(frame)
+                if stack:
+                    key = f"{names.get(ident, ident)};{stack}"
+                    for counts in sessions:
+                        counts[key] += 1
+            time.sleep(self.interval_seconds)
+
+
+def write_folded(profile_id: str, label: str, counts: Counter) -> str:
+    settings = get_settings()
+    out_dir = settings.profiling_output_dir
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{profile_id}.folded")
+    with open(path, "w") as f:
+        f.write(f"# {label}\n")
+        for stack, n in counts.most_common():
+            f.write(f"{stack} {n}\n")
+    _prune(out_dir, settings.profiling_max_files)
+    return path
+
+
+def _prune(out_dir: str, keep: int) -> None:
+    """Delete all but the newest `keep` profiles (ids start with a UTC timestamp, so names sort by age)."""
+    names = sorted(n for n in os.listdir(out_dir) if n.endswith(".folded"))
+    for name in names[:max(len(names) - keep, 0)]:
+        try:
+            os.remove(os.path.join(out_dir, name))
+        except FileNotFoundError:
+            pass
+
+
+@lru_cache
+def get_sampler() -> StackSampler:
+    return StackSampler(get_settings().profiling_interval_ms / 1000)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+        settings = get_settings()
+        self.sample_rate = settings.profiling_sample_rate
+        self.token = settings.profiling_token
+
+    def _wanted(self, scope) -> bool:
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == b"x-profile":
+                    return secrets.compare_digest(value.decode("latin-1"), self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+        sampler = get_sampler()
+        profile_id = sampler.begin()
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            counts = sampler.end(profile_id)
+            label = f"{scope['method']} {scope['path']} {(time.perf_counter() - start) * 1000:.1f}ms"
+            try:
+                path = await run_in_threadpool(write_folded, profile_id, label, counts)
+                logger.info("profile %s (%s, %d samples) -> %s", profile_id, label, sum(counts.values()), path)
+            except OSError:
+                logger.exception("could not write profile %s", profile_id)
+
+
+class LoopLagMonitor:
+    def __init__(self, interval_seconds: float, threshold_ms: float, history: int = 50):
+        self.interval_seconds = interval_seconds
+        self.threshold_ms = threshold_ms
+        self.max_lag_ms = 0.0
+        self.stalls: deque[dict] = deque(maxlen=history)
+        self._beat = time.monotonic()
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+        self._stop = threading.Event()
+
+    def stats(self) -> dict:
+        return {"max_lag_ms": round(self.max_lag_ms, 1), "stalls": len(self.stalls), "recent": list(self.stalls)[-5:]}
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._tick())
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _tick(self) -> None:
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval_seconds)
+            now = time.monotonic()
+            self._beat = now
+            self.max_lag_ms = max(self.max_lag_ms, (now - before - self.interval_seconds) * 1000)
+
+    def _watch(self) -> None:
+        reported = None  # beat already reported, so one stall logs once
+        while not self._stop.wait(self.interval_seconds):
+            beat = self._beat
+            late_ms = (time.monotonic() - beat - self.interval_seconds) * 1000
+            if late_ms < self.threshold_ms or reported == beat:
+                continue
+            reported = beat
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = _fold(frame) if frame is not None else None
+            self.stalls.append({"at": datetime.now(timezone.utc).isoformat(), "late_ms": round(late_ms, 1), "stack": stack})
+            logger.warning("event loop blocked for %.0f ms at: %s", late_ms, stack)
+
+
+@lru_cache
+def get_loop_monitor() -> LoopLagMonitor:
+    settings = get_settings()
+    return LoopLagMonitor(settings.loop_monitor_interval_seconds, settings.loop_lag_threshold_ms)
@@ -0,0 +1,230 @@
+"""Verified-token cache and token revocation.
+
+`verify_token` skips HS256 verification for tokens seen recently (keyed by SHA-256
+digest, expiring with `exp`) and rejects revoked refresh-token ids (`jti`) and
+session families (`fam`). Revocations are written to `revoked_tokens` as they happen
+and mirrored in memory: the full list is loaded during warm-up and new rows from
+other workers are merged every `revocation_sync_seconds`. Checks go through a Bloom
+filter first, so the common not-revoked case is a few bit tests and never touches the
+database. Until the first load completes, token checks fail with 503 (as `/ready` does)
+rather than accept a token that may have been revoked.
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.core.errors import ServiceUnavailableError
+from app.core.security import decode_token
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = 1000  # PostgREST's default row cap
+_SYNC_OVERLAP = timedelta(minutes=1)  # re-read this far back to absorb clock skew between workers
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter (double hashing over one blake2b digest)."""
+
+    def __init__(self, size_bits: int = 1 << 20, hashes: int = 5):
+        self.size = size_bits
+        self.hashes = hashes
+        self._bits = bytearray(size_bits // 8)
+
+    def _positions(self, item: str):
+        d = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(d[:8], "little")
+        h2 = int.from_bytes(d[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for p in self._positions(item):
+            self._bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+def _ts(value: str) -> float:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+class RevocationList:
+    """Revoked jti / family ids, each kept until the longest-lived token it could match expires."""
+
+    def __init__(self):
+        self._revoked: dict[str, float] = {}  # id -> unix time after which it can be forgotten
+        self._bloom = BloomFilter()
+        self._lock = threading.Lock()  # writers (sync/revoke/prune) run in several threads
+        self._sync_lock = threading.Lock()
+        self.loaded = False
+        self._synced_to: datetime | None = None  # revoked_at high-water mark of merged rows
+
+    def _remember(self, item: str, until: float) -> None:
+        with self._lock:
+            self._revoked[item] = max(until, self._revoked.get(item, 0))
+            self._bloom.add(item)
+
+    def revoke(self, item: str, until: float) -> None:
+        """Record a revocation durably (blocking), then locally."""
+        from app.db.supabase import get_supabase
+
+        get_supabase().table("revoked_tokens").upsert(
+            {"id": item, "expires_at": _iso(until), "revoked_at": datetime.now(timezone.utc).isoformat()},
+            on_conflict="id",
+        ).execute()
+        self._remember(item, until)
+
+    def is_revoked(self, item: str | None) -> bool:
+        if not self.loaded:
+            raise ServiceUnavailableError("Token revocation list is still loading")
+        if not item or item not in self._bloom:
+            return False
+        until = self._revoked.get(item)
+        return until is not None and until > time.time()
+
+    def sync(self) -> int:
+        """Merge unexpired rows revoked since the last sync (all of them on first call); blocking."""
+        from app.db.supabase import get_supabase
+
+        with self._sync_lock:
+            now = datetime.now(timezone.utc)
+            since = self._synced_to - _SYNC_OVERLAP if self._synced_to is not None else None
+            merged = 0
+            while True:
+                q = get_supabase().table("revoked_tokens").select("id, expires_at, revoked_at").gt("expires_at", now.isoformat())
+                if since is not None:
+                    q = q.gte("revoked_at", since.isoformat())
+                rows = q.order("revoked_at").order("id").range(merged, merged + _PAGE_SIZE - 1).execute().data or []
+                for row in rows:
+                    self._remember(row["id"], _ts(row["expires_at"]))
+                    self._synced_to = max(self._synced_to or now, datetime.fromisoformat(row["revoked_at"].replace("Z", "+00:00")))
+                merged += len(rows)
+                if len(rows) < _PAGE_SIZE:
+                    break
+            if self._synced_to is None:
+                self._synced_to = now
+            self.loaded = True
+            return merged
+
+    def prune(self) -> None:
+        """Drop expired ids and rebuild the filter so false positives don't accumulate (blocking)."""
+        with self._lock:
+            now = time.time()
+            revoked = {k: v for k, v in self._revoked.items() if v > now}
+            bloom = BloomFilter()
+            for k in revoked:
+                bloom.add(k)
+            # Swap both together; readers see the old pair or the new one
+            self._revoked, self._bloom = revoked, bloom
+
+
+class RevocationSync:
+    """Merges revocations made by other workers and deletes expired rows."""
+
+    def __init__(self, revocation_list: RevocationList, interval_seconds: float):
+        self.revocations = revocation_list
+        self.interval_seconds = interval_seconds
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        last_cleanup = time.monotonic()
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await run_in_threadpool(self.revocations.sync)
+                if time.monotonic() - last_cleanup > 3600:
+                    last_cleanup = time.monotonic()
+                    await run_in_threadpool(self.revocations.prune)
+                    await run_in_threadpool(_delete_expired)
+            except Exception:
+                logger.exception("revocation sync failed")
+
+
+def _delete_expired() -> None:
+    from app.db.supabase import get_supabase
+
+    get_supabase().table("revoked_tokens").delete().lt("expires_at", datetime.now(timezone.utc).isoformat()).execute()
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of token digest -> decoded payload, valid until the token's `exp`."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, dict]" = OrderedDict()
+
+    def get(self, digest: bytes) -> dict | None:
+        payload = self._entries.get(digest)
+        if payload is None:
+            return None
+        if payload.get("exp", 0) <= time.time():
+            del self._entries[digest]
+            return None
+        self._entries.move_to_end(digest)
+        return payload
+
+    def put(self, digest: bytes, payload: dict) -> None:
+        self._entries[digest] = payload
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+_cache = VerifiedTokenCache(get_settings().token_cache_max_entries)
+revocations = RevocationList()
+
+
+def verify_token(token: str, token_type: str) -> dict | None:
+    """Decoded payload if `token` is valid, unexpired, of `token_type` and not revoked."""
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = _cache.get(digest)
+    if payload is None:
+        payload = decode_token(token)
+        if not payload:
+            return None
+        _cache.put(digest, payload)
+    if payload.get("type") != token_type:
+        return None
+    if revocations.is_revoked(payload.get("fam")) or revocations.is_revoked(payload.get("jti")):
+        return None
+    return payload
+
+
+@lru_cache
+def get_revocation_sync() -> RevocationSync:
+    return RevocationSync(revocations, get_settings().revocation_sync_seconds)
+
+
+def revoke_refresh(payload: dict, family: bool = False) -> None:
+    """Revoke a refresh token's jti, or its whole session family (also ends the family's access tokens)."""
+    settings = get_settings()
+    if family and payload.get("fam"):
+        # Any token of the family, access or refresh, is issued at most one refresh lifetime from now
+        revocations.revoke(payload["fam"], time.time() + settings.refresh_token_expire_days * 86400)
+    if payload.get("jti"):
+        revocations.revoke(payload["jti"], float(payload.get("exp", time.time())))
@@ -0,0 +1,34 @@
+"""Size-bounded, chunked reads of request bodies and uploaded files."""
+from typing import AsyncIterator
+
+from fastapi import Request, UploadFile
+
+from app.core.errors import ValidationError
+
+CHUNK_SIZE = 64 * 1024
+# Allowance for multipart boundaries and part headers on top of the payload itself
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+def check_content_length(request: Request, max_bytes: int) -> None:
+    """Reject a declared oversized body before any of it is read."""
+    declared = request.headers.get("content-length")
+    if declared is None:
+        return
+    if not declared.isdigit() or int(declared) > max_bytes + MULTIPART_OVERHEAD:
+        raise ValidationError(f"Upload exceeds {max_bytes} bytes", field="file", constraint="max_size")
+
+
+async def iter_upload(file: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await file.read(CHUNK_SIZE):
+        yield chunk
+
+
+async def read_capped(chunks: AsyncIterator[bytes], max_bytes: int) -> bytes:
+    """Accumulate chunks, aborting as soon as the running size passes `max_bytes`."""
+    buf = bytearray()
+    async for chunk in chunks:
+        buf += chunk
+        if len(buf) > max_bytes:
+            raise ValidationError(f"Upload exceeds {max_bytes} bytes", field="file", constraint="max_size")
+    return bytes(buf)
@@ -0,0 +1,101 @@
+"""Background warm-up of heavy clients after startup, reported by `/ready`.
+
+Heavy packages are imported lazily, so the process starts serving quickly; this runs the
+first-use cost (imports, client construction) in the threadpool right after startup so
+the first real request does not pay it on the event loop. Startup work that needs the
+database (loading revocations, re-queueing media) runs here too, so an outage delays
+readiness instead of preventing startup; failed steps are retried with backoff.
+"""
+import asyncio
+import inspect
+import logging
+import time
+from functools import lru_cache
+from typing import Callable
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_RETRY_MAX_SECONDS = 30.0
+
+
+def _supabase() -> None:
+    from app.db.supabase import get_supabase
+
+    get_supabase()
+
+
+def _llm() -> bool:
+    if not get_settings().groq_api_key:
+        return False
+    from app.services.ai_service import _groq
+
+    _groq()
+    return True
+
+
+def _revocations() -> None:
+    from app.core.token_store import revocations
+
+    revocations.sync()
+
+
+async def _media() -> None:
+    from app.services.media_pipeline import get_media_processor
+
+    await get_media_processor().requeue_pending()
+
+
+def _passwords() -> None:
+    from app.core.security import pwd_context
+
+    pwd_context()
+
+
+class Warmup:
+    def __init__(self, steps: dict[str, Callable]):
+        self.steps = steps
+        self.state: dict[str, str] = {name: "pending" for name in steps}
+        self.elapsed_ms: dict[str, float] = {}
+        self._task: asyncio.Task | None = None
+
+    @property
+    def ready(self) -> bool:
+        return all(s in ("ready", "skipped") for s in self.state.values())
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        for name, step in self.steps.items():
+            start = time.perf_counter()
+            delay = 1.0
+            while True:
+                try:
+                    done = await step() if inspect.iscoroutinefunction(step) else await run_in_threadpool(step)
+                    self.state[name] = "skipped" if done is False else "ready"
+                    break
+                except Exception:
+                    logger.exception("warm-up step %s failed; retrying in %.0fs", name, delay)
+                    self.state[name] = "failed"
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, _RETRY_MAX_SECONDS)
+            self.elapsed_ms[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+@lru_cache
+def get_warmup() -> Warmup:
+    return Warmup({"supabase": _supabase, "revocations": _revocations, "media": _media, "llm": _llm, "passwords": _passwords})
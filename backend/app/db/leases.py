@@ -0,0 +1,24 @@
+"""Cross-worker job leases (`job_leases` table).
+
+A background job that must run in one worker at a time takes a named lease before
+each run and renews it while working; a lease whose holder died lapses after its
+TTL. Session-level advisory locks don't fit here: every PostgREST call runs on
+whichever pooled connection is free, so a lock taken in one RPC would be held by
+(and leak on) a connection the caller never sees again.
+"""
+import uuid
+
+from app.db.supabase import get_supabase
+
+WORKER_ID = uuid.uuid4().hex  # this process's holder id
+
+
+def try_lease(name: str, seconds: float) -> bool:
+    """Take or renew lease `name` for `seconds`; False if another worker holds it (blocking)."""
+    r = get_supabase().rpc("try_job_lease", {"p_name": name, "p_holder": WORKER_ID, "p_seconds": seconds}).execute()
+    return bool(r.data)
+
+
+def release_lease(name: str) -> None:
+    """Give up lease `name` if this worker holds it, so another can take over now (blocking)."""
+    get_supabase().table("job_leases").delete().eq("name", name).eq("holder", WORKER_ID).execute()
@@ -1,18 +1,28 @@
-"""Supabase client singleton."""
-from functools import lru_cache
+"""Supabase client singleton.
 
-from supabase import create_client, Client
+The supabase package (postgrest, gotrue, storage3, ...) is imported on first use rather
+than at module import, which keeps process start fast; `lifespan` warms it up.
+"""
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
 from app.config import get_settings
 
+if TYPE_CHECKING:
+    from supabase import Client
+
 
 @lru_cache
-def get_supabase() -> Client:
+def get_supabase() -> "Client":
+    from supabase import create_client
+
     settings = get_settings()
     return create_client(settings.supabase_url, settings.supabase_service_key)
 
 
-def get_supabase_anon() -> Client:
+def get_supabase_anon() -> "Client":
     """Client with anon key for auth flows; use service key for backend ops."""
+    from supabase import create_client
+
     settings = get_settings()
     return create_client(settings.supabase_url, settings.supabase_anon_key)
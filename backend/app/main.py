@@ -1,20 +1,38 @@
 """AI Journal API - FastAPI application."""
+import secrets
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Header, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from app.config import get_settings
+from app.core.admission import AdmissionMiddleware, admission_stats
+from app.core.compression import CompressionMiddleware
+from app.core.concurrency import shutdown_process_pool
+from app.core.profiling import ProfilingMiddleware, get_loop_monitor
+from app.core.token_store import get_revocation_sync
+from app.core.warmup import get_warmup
 from app.core.errors import (
     APIErrorResponse,
     ErrorBody,
     ErrorCode,
     AppException,
+    NotFoundError,
+    UnauthorizedError,
 )
 from app.api.v1 import router as api_v1_router
+from app.services.autosave import get_autosave
+from app.services.catalog import get_catalog_refresher
+from app.services.entry_pipeline import get_backfill_jobs
+from app.services.insights_jobs import get_insights_runner
+from app.services.media_pipeline import get_media_processor
+from app.services.reminders import get_reminder_scheduler
+from app.services.trash_purge import get_trash_purger
+from app.services.weather import get_weather_enricher
+from app.services.write_behind import get_write_behind
 
 
 @asynccontextmanager
@@ -23,7 +41,35 @@ async def lifespan(app: FastAPI):
         import sentry_sdk
         from sentry_sdk.integrations.fastapi import FastApiIntegration
         sentry_sdk.init(dsn=get_settings().sentry_dsn, integrations=[FastApiIntegration()])
+    get_warmup().start()
+    get_revocation_sync().start()
+    if get_settings().loop_monitor_enabled:
+        get_loop_monitor().start()
+    write_behind = get_write_behind()
+    write_behind.start()
+    get_catalog_refresher().start()
+    if get_settings().insights_enabled:
+        get_insights_runner().start()
+    if get_settings().reminders_enabled:
+        get_reminder_scheduler().start()
+    if get_settings().trash_purge_enabled:
+        get_trash_purger().start()
+    get_media_processor().start()
+    get_weather_enricher().start()
     yield
+    await get_warmup().stop()
+    await get_autosave().flush_all()
+    await get_backfill_jobs().stop()
+    await get_weather_enricher().stop()
+    await get_media_processor().stop()
+    await get_trash_purger().stop()
+    await get_reminder_scheduler().stop()
+    await get_insights_runner().stop()
+    await get_catalog_refresher().stop()
+    await write_behind.stop()
+    await get_revocation_sync().stop()
+    await get_loop_monitor().stop()
+    shutdown_process_pool()
 
 
 app = FastAPI(
@@ -33,6 +79,12 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Compression innermost: it sees each SSE chunk as it is produced and flushes per event
+app.add_middleware(CompressionMiddleware)
+# Profiling next so queue time is not attributed to the handler
+app.add_middleware(ProfilingMiddleware)
+# Added before CORS so it sits inside it: shed 503s still carry CORS headers
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -87,4 +139,23 @@ async def health():
     return {"status": "ok", "timestamp": datetime.now(timezone.utc).isoformat()}
 
 
+@app.get("/health/details")
+async def health_details(x_diagnostics_token: str | None = Header(None)):
+    """Admission and event-loop internals for operators; needs `X-Diagnostics-Token: <PROFILING_TOKEN>`."""
+    token = get_settings().profiling_token
+    if not token:
+        raise NotFoundError()
+    if not x_diagnostics_token or not secrets.compare_digest(x_diagnostics_token, token):
+        raise UnauthorizedError("Diagnostics token required")
+    return {"load": admission_stats(), "loop": get_loop_monitor().stats()}
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness: 503 until every warm-up step has succeeded (failed steps are retried)."""
+    warmup = get_warmup()
+    body = {"ready": warmup.ready, "steps": warmup.state, "elapsed_ms": warmup.elapsed_ms}
+    return JSONResponse(body, status_code=200 if warmup.ready else 503)
+
+
 app.include_router(api_v1_router, prefix=get_settings().api_v1_prefix)
@@ -45,6 +45,29 @@ class EntryUpdate(BaseModel):
     tags: list[str] | None = None
 
 
+class TextEdit(BaseModel):
+    """Replace content[start:end] with `text`; offsets in UTF-16 code units against the base revision."""
+    start: int = Field(..., ge=0)
+    end: int = Field(..., ge=0)
+    text: str = ""
+
+
+class AutosaveRequest(BaseModel):
+    base_revision: int = Field(..., ge=0)
+    edits: list[TextEdit] = Field(default_factory=list, max_length=500)
+    title: str | None = None
+
+
+class EntryMediaSummary(BaseModel):
+    id: str
+    media_type: str
+    file_name: str | None = None
+    mime_type: str | None = None
+    duration: int | None = None
+    thumbnail_path: str | None = None
+    status: str | None = None
+
+
 class EntryResponse(BaseModel):
     id: str
     user_id: str
@@ -63,7 +86,19 @@ class EntryResponse(BaseModel):
     template_id: str | None
     created_at: datetime
     updated_at: datetime
+    deleted_at: datetime | None = None  # set only for entries in the trash
+    revision: int | None = None  # base for autosave edits
     tags: list[str] | None = None
+    media: list[EntryMediaSummary] | None = None
+    # Text statistics derived at write time
+    reading_time_seconds: int | None = None
+    sentence_count: int | None = None
+    unique_word_count: int | None = None
+    keywords: list[str] | None = None
+    # Offline sentiment suggestion; the user's own mood stays authoritative
+    sentiment_score: float | None = None
+    inferred_mood: str | None = None
+    inferred_mood_intensity: int | None = None
 
     class Config:
         from_attributes = True
@@ -0,0 +1,45 @@
+"""Goal schemas."""
+from datetime import date, datetime
+
+from pydantic import BaseModel, Field
+
+GOAL_METRICS = ("manual", "entries", "words")
+GOAL_PERIODS = ("week", "month", "quarter", "year", "custom")
+
+
+class GoalCreate(BaseModel):
+    goal_text: str = Field(..., min_length=1)
+    category: str | None = None
+    notes: str | None = None
+    metric: str = "manual"  # one of GOAL_METRICS; entries/words are counted automatically
+    target_value: int | None = Field(None, gt=0)
+    period: str | None = None  # one of GOAL_PERIODS; the current one is used
+    period_start: date | None = None  # custom period only
+    period_end: date | None = None
+
+
+class GoalUpdate(BaseModel):
+    goal_text: str | None = None
+    category: str | None = None
+    notes: str | None = None
+    target_value: int | None = Field(None, gt=0)
+    progress: int | None = Field(None, ge=0, le=100)  # manual goals only
+    completed: bool | None = None  # manual goals only
+
+
+class GoalResponse(BaseModel):
+    id: str
+    goal_text: str
+    category: str | None = None
+    notes: str | None = None
+    metric: str = "manual"
+    target_value: int | None = None
+    period: str | None = None
+    period_start: date | None = None
+    period_end: date | None = None
+    current_value: int = 0
+    progress: int = 0
+    completed: bool = False
+    completed_at: datetime | None = None
+    created_at: datetime
+    updated_at: datetime
@@ -0,0 +1,24 @@
+"""Tag management schemas."""
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class TagResponse(BaseModel):
+    tag: str
+    usage_count: int
+    last_used_at: datetime | None = None
+
+
+class TagRename(BaseModel):
+    tag: str = Field(..., min_length=1)
+    new_tag: str = Field(..., min_length=1)  # merges into it if the user already has this tag
+
+
+class TagMerge(BaseModel):
+    sources: list[str] = Field(..., min_length=1, max_length=50)
+    target: str = Field(..., min_length=1)
+
+
+class TagChangeResponse(BaseModel):
+    entries_updated: int
@@ -34,6 +34,7 @@ class UserPreferencesResponse(BaseModel):
     reminder_enabled: bool
     reminder_time: str | None
     reminder_days: list[str] | None
+    timezone: str
     auto_save_interval: int
     show_word_count: bool
     ai_enabled: bool
@@ -49,6 +50,7 @@ class UserPreferencesUpdate(BaseModel):
     reminder_enabled: bool | None = None
     reminder_time: str | None = None
     reminder_days: list[str] | None = None
+    timezone: str | None = None  # IANA name, e.g. "Asia/Kolkata"
     auto_save_interval: int | None = None
     show_word_count: bool | None = None
     ai_enabled: bool | None = None
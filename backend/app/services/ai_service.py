@@ -1,4 +1,6 @@
-"""AI: prompts, chat, improve text via Groq (free API)."""
+"""AI: prompts, chat, improve text, reflections via Groq (free API)."""
+import json
+
 from app.config import get_settings
 from app.core.errors import AIServiceError
 
@@ -50,6 +52,34 @@ def improve_text(text: str, instruction: str = "improve clarity and grammar") ->
     return (r.choices[0].message.content or text).strip()
 
 
+def generate_reflection(entries: list[dict], period_label: str) -> dict:
+    """Summarize a period's entries into a reflection insight ({"summary", "themes", "encouragement"})."""
+    client = _groq()
+    model = get_settings().groq_model
+    body = "\n\n".join(
+        f"[{e.get('entry_date')}] mood={e.get('mood') or 'n/a'}\n{(e.get('content') or '')[:1500]}" for e in entries
+    )
+    r = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": (
+                f"You are a reflective journaling assistant. Read the user's journal entries from {period_label} "
+                'and reply with JSON only: {"summary": "2-3 sentences", "themes": ["..."], "encouragement": "1 sentence"}.'
+            )},
+            {"role": "user", "content": body[:12000]},
+        ],
+        max_tokens=400,
+        response_format={"type": "json_object"},
+    )
+    if not r.choices:
+        raise AIServiceError("No response from Groq")
+    text = (r.choices[0].message.content or "").strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        return {"summary": text}
+
+
 def chat_stream(user_id: str, message: str, history: list[dict]) -> "Iterator[str]":
     """Stream chat completion chunks from Groq."""
     client = _groq()
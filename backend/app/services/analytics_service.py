@@ -0,0 +1,75 @@
+"""Analytics aggregation: period windows, mood bucketing and calendar heatmap rollups."""
+import base64
+from datetime import date, timedelta
+
+from app.core.errors import ValidationError
+from app.schemas.entry import MOOD_VALUES
+
+PERIODS = {"7d": 7, "30d": 30, "90d": 90, "1y": 365, "all": None}
+BUCKETS = ("day", "week", "month")
+
+
+def parse_period(period: str, today: date | None = None) -> date | None:
+    """Return the first date included in `period` (None for "all")."""
+    if period not in PERIODS:
+        raise ValidationError(f"Invalid period; use one of {', '.join(PERIODS)}", field="period", constraint="enum")
+    days = PERIODS[period]
+    if days is None:
+        return None
+    return (today or date.today()) - timedelta(days=days - 1)
+
+
+def bucket_moods(rows: list[dict]) -> list[dict]:
+    """Shape per-bucket aggregates from the `mood_buckets` function: moods in legend order, zeros dropped."""
+    return [
+        {
+            "start": str(r["start"]),
+            "count": r["count"],
+            "moods": {m: r["moods"][m] for m in MOOD_VALUES if (r.get("moods") or {}).get(m)},
+            "average_intensity": float(r["average_intensity"]) if r.get("average_intensity") is not None else None,
+        }
+        for r in rows
+    ]
+
+
+def day_rollup(rows: list[dict], start: date, end: date) -> dict:
+    """Compact per-day heatmap for [start, end]: a date bitmap plus per-active-day columns.
+
+    `rows` are per-day aggregates (entry_date, entries, words, moods as {mood: count}) from
+    the `entry_day_rollup` function. `bitmap` is base64 of one bit per day (LSB-first, day 0 =
+    start). `counts`, `moods` (index into `mood_legend`, -1 if none) and `words` list only days
+    whose bit is set, in order.
+    """
+    days = (end - start).days + 1
+    base = start.toordinal()
+    mood_index = {m: i for i, m in enumerate(MOOD_VALUES)}
+    counts: dict[int, int] = {}
+    words: dict[int, int] = {}
+    mood_counts: dict[int, list[int]] = {}
+    for r in rows:
+        d = date.fromisoformat(str(r["entry_date"])[:10]).toordinal() - base
+        if not 0 <= d < days or not r.get("entries"):
+            continue
+        counts[d] = r["entries"]
+        words[d] = r.get("words") or 0
+        for mood, n in (r.get("moods") or {}).items():
+            i = mood_index.get(mood)
+            if i is not None:
+                mood_counts.setdefault(d, [0] * len(MOOD_VALUES))[i] += n
+    bitmap = bytearray((days + 7) // 8)
+    active = sorted(counts)
+    dominant = []
+    for d in active:
+        bitmap[d >> 3] |= 1 << (d & 7)
+        mc = mood_counts.get(d)
+        dominant.append(max(range(len(mc)), key=mc.__getitem__) if mc else -1)
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "days": days,
+        "bitmap": base64.b64encode(bytes(bitmap)).decode("ascii"),
+        "counts": [counts[d] for d in active],
+        "moods": dominant,
+        "words": [words[d] for d in active],
+        "mood_legend": list(MOOD_VALUES),
+    }
@@ -1,4 +1,6 @@
 """Auth: Supabase auth + our JWT and users table."""
+from uuid import uuid4
+
 from app.config import get_settings
 from app.core.errors import UnauthorizedError, ValidationError, ConflictError
 from app.core.security import (
@@ -8,17 +10,29 @@ from app.core.security import (
     hash_password,
     verify_password,
 )
+from app.core.token_store import revocations, revoke_refresh, verify_token
 from app.db.supabase import get_supabase
+from app.services.write_behind import get_write_behind
 
 
 def _supabase():
     return get_supabase()
 
 
+def _issue_tokens(user_id: str, family: str | None = None) -> dict:
+    settings = get_settings()
+    family = family or uuid4().hex
+    return {
+        "access_token": create_access_token(user_id, family=family),
+        "refresh_token": create_refresh_token(user_id, family=family),
+        "token_type": "bearer",
+        "expires_in": settings.access_token_expire_minutes * 60,
+    }
+
+
 def register(email: str, password: str, full_name: str | None = None) -> dict:
     """Sign up via Supabase Auth and ensure user row in public.users."""
     supabase = _supabase()
-    settings = get_settings()
     # Supabase auth sign_up (creates auth.users row)
     resp = supabase.auth.sign_up({"email": email, "password": password, "options": {"data": {"full_name": full_name or ""}}})
     if resp.user is None:
@@ -35,20 +49,12 @@ def register(email: str, password: str, full_name: str | None = None) -> dict:
         "onboarding_completed": False,
     }, on_conflict="id").execute()
     # Prefer returning our JWT so client uses same token format everywhere
-    access = create_access_token(user_id)
-    refresh = create_refresh_token(user_id)
-    return {
-        "access_token": access,
-        "refresh_token": refresh,
-        "token_type": "bearer",
-        "expires_in": settings.access_token_expire_minutes * 60,
-    }
+    return _issue_tokens(user_id)
 
 
 def login(email: str, password: str) -> dict:
     """Sign in via Supabase Auth; return our JWT."""
     supabase = _supabase()
-    settings = get_settings()
     try:
         resp = supabase.auth.sign_in_with_password({"email": email, "password": password})
     except Exception as e:
@@ -65,46 +71,38 @@ def login(email: str, password: str) -> dict:
     # Do not fail login if upsert fails; GET /user/profile will create the row on first access.
     meta = getattr(resp.user, "user_metadata", None) or {}
     full_name = meta.get("full_name") if isinstance(meta, dict) else None
-    try:
-        supabase.table("users").upsert({
-            "id": user_id,
-            "email": email,
-            "full_name": full_name,
-        }, on_conflict="id").execute()
-    except Exception:
-        pass  # Profile will be created when client calls GET /user/profile
-    access = create_access_token(user_id)
-    refresh = create_refresh_token(user_id)
-    return {
-        "access_token": access,
-        "refresh_token": refresh,
-        "token_type": "bearer",
-        "expires_in": settings.access_token_expire_minutes * 60,
-    }
+    # Best-effort and off the login path: GET /user/profile creates the row if this never lands
+    get_write_behind().submit("users", {
+        "id": user_id,
+        "email": email,
+        "full_name": full_name,
+    }, op="upsert", on_conflict="id", key=user_id)
+    return _issue_tokens(user_id)
 
 
 def refresh_tokens(refresh_token: str) -> dict:
-    """Issue new access (and optionally refresh) from refresh token."""
-    payload = decode_token(refresh_token)
-    if not payload or payload.get("type") != "refresh":
+    """Rotate: issue new access and refresh tokens in the same family and revoke the old refresh."""
+    payload = verify_token(refresh_token, "refresh")
+    if not payload:
+        stale = decode_token(refresh_token)
+        if stale and stale.get("type") == "refresh" and revocations.is_revoked(stale.get("jti")):
+            # A rotated-out refresh token was replayed: assume theft and end the whole session
+            revoke_refresh(stale, family=True)
         raise UnauthorizedError("Invalid or expired refresh token")
     sub = payload.get("sub")
     if not sub:
         raise UnauthorizedError("Invalid refresh token")
-    settings = get_settings()
-    access = create_access_token(sub)
-    new_refresh = create_refresh_token(sub)
-    return {
-        "access_token": access,
-        "refresh_token": new_refresh,
-        "token_type": "bearer",
-        "expires_in": settings.access_token_expire_minutes * 60,
-    }
+    revoke_refresh(payload)
+    return _issue_tokens(sub, family=payload.get("fam"))
 
 
-def logout(user_id: str) -> None:
-    """Server-side: optionally invalidate refresh tokens (e.g. store blacklist). No-op for now."""
-    pass
+def logout(token_payload: dict, refresh_token: str | None = None) -> None:
+    """Revoke the caller's session family (its access and refresh tokens) and the given refresh token."""
+    revoke_refresh(token_payload, family=True)
+    if refresh_token:
+        payload = decode_token(refresh_token)
+        if payload and payload.get("type") == "refresh" and payload.get("sub") == token_payload.get("sub"):
+            revoke_refresh(payload, family=True)
 
 
 def forgot_password(email: str) -> None:
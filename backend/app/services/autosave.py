@@ -0,0 +1,168 @@
+"""Diff-based draft autosave with per-entry coalescing.
+
+Clients send text edits against the revision they last saw. The entry's text is held
+in this process while it is being edited: each save checks the revision, applies the
+edits in memory and bumps the revision, and the database write is debounced so a burst
+of saves becomes one update (`autosave_debounce_seconds` after the last save, at most
+`autosave_max_delay_seconds` after the first unsaved one); a failed write is retried with
+exponential backoff up to `_RETRY_MAX_SECONDS`. That write only re-derives
+the stored text columns; tags are left alone and nothing is re-read. It is conditional on
+the revision last persisted, so if anything else changed the entry meanwhile the buffered
+draft is dropped and the client's next save gets a 409. Use sticky routing per entry with
+several workers; a crash loses at most the debounce window.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.core.errors import ConflictError, NotFoundError, ValidationError
+from app.db.supabase import get_supabase
+from app.services import entry_pipeline
+
+logger = logging.getLogger(__name__)
+
+_RETRY_MAX_SECONDS = 60.0
+
+
+def apply_edits(text: str, edits: list[tuple[int, int, str]]) -> str:
+    """Apply (start, end, replacement) splices given against `text` in UTF-16 code units
+    (JavaScript/Dart string indices). Splices must not overlap."""
+    buf = text.encode("utf-16-le")
+    units = len(buf) // 2
+    last = units
+    for start, end, replacement in sorted(edits, key=lambda e: e[0], reverse=True):
+        if not 0 <= start <= end <= last:
+            raise ValidationError("Edits must be in range and must not overlap", field="edits", constraint="range")
+        buf = buf[:start * 2] + replacement.encode("utf-16-le") + buf[end * 2:]
+        last = start
+    try:
+        return buf.decode("utf-16-le")
+    except UnicodeDecodeError:
+        raise ValidationError("Edit splits a surrogate pair", field="edits", constraint="range")
+
+
+@dataclass
+class Draft:
+    user_id: str
+    content: str
+    title: str | None
+    revision: int
+    persisted_revision: int
+    first_dirty: float | None = None
+    failures: int = 0  # consecutive failed flushes, for retry backoff
+    timer: asyncio.TimerHandle | None = None
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class AutosaveBuffer:
+    def __init__(self, debounce_seconds: float, max_delay_seconds: float):
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self._drafts: dict[str, Draft] = {}
+        self._flushes: set[asyncio.Task] = set()
+
+    async def _load(self, entry_id: str, user_id: str) -> Draft:
+        draft = self._drafts.get(entry_id)
+        if draft is not None and draft.user_id == user_id:
+            return draft
+        r = await run_in_threadpool(
+            get_supabase().table("journal_entries").select("content, title, revision").eq("id", entry_id).eq("user_id", user_id).is_("deleted_at", "null").execute
+        )
+        if not r.data:
+            raise NotFoundError("Entry not found")
+        # A concurrent save may have loaded (and already edited) the draft during the read
+        draft = self._drafts.get(entry_id)
+        if draft is not None and draft.user_id == user_id:
+            return draft
+        row = r.data[0]
+        revision = row.get("revision") or 0
+        draft = Draft(user_id, row.get("content") or "", row.get("title"), revision, revision)
+        self._drafts[entry_id] = draft
+        return draft
+
+    async def save(self, entry_id: str, user_id: str, base_revision: int, edits: list[tuple[int, int, str]], title: str | None, set_title: bool) -> int:
+        draft = await self._load(entry_id, user_id)
+        if base_revision != draft.revision:
+            raise ConflictError("Entry changed since base_revision", {"revision": draft.revision})
+        content = apply_edits(draft.content, edits)
+        if not content.strip():
+            raise ValidationError("Content cannot be empty", field="edits", constraint="min_length")
+        draft.content = content
+        if set_title:
+            draft.title = title
+        draft.revision += 1
+        self._schedule(entry_id, draft)
+        return draft.revision
+
+    def _schedule(self, entry_id: str, draft: Draft) -> None:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if draft.first_dirty is None:
+            draft.first_dirty = now
+        if draft.failures and draft.timer is not None:
+            return  # a backed-off retry is pending and will write these edits too
+        if draft.timer is not None:
+            draft.timer.cancel()
+        delay = min(self.debounce_seconds, max(draft.first_dirty + self.max_delay_seconds - now, 0))
+        draft.timer = loop.call_later(delay, self._spawn_flush, entry_id)
+
+    def _schedule_retry(self, entry_id: str, draft: Draft) -> None:
+        """Retry a failed flush after an exponential backoff, independent of the debounce clamp."""
+        draft.failures += 1
+        delay = min(self.debounce_seconds * 2 ** draft.failures, _RETRY_MAX_SECONDS)
+        draft.timer = asyncio.get_running_loop().call_later(delay, self._spawn_flush, entry_id)
+
+    def _spawn_flush(self, entry_id: str) -> None:
+        task = asyncio.create_task(self.flush(entry_id))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def flush(self, entry_id: str) -> None:
+        """Write the buffered draft now, if it has unsaved edits."""
+        draft = self._drafts.get(entry_id)
+        if draft is None:
+            return
+        async with draft.lock:
+            if draft.timer is not None:
+                draft.timer.cancel()
+                draft.timer = None
+            if draft.revision == draft.persisted_revision:
+                return
+            revision, content = draft.revision, draft.content
+            payload = {"content": content, "title": draft.title, "revision": revision, **entry_pipeline.derive(content)}
+            try:
+                r = await run_in_threadpool(
+                    get_supabase().table("journal_entries").update(payload).eq("id", entry_id).eq("user_id", draft.user_id).eq("revision", draft.persisted_revision).execute
+                )
+            except Exception:
+                logger.exception("autosave flush failed for entry %s (attempt %d)", entry_id, draft.failures + 1)
+                self._schedule_retry(entry_id, draft)  # keep the draft
+                return
+            draft.failures = 0
+            if not r.data:
+                logger.warning("entry %s changed outside autosave; dropping buffered draft", entry_id)
+                self._drafts.pop(entry_id, None)
+                return
+            draft.persisted_revision = revision
+            draft.first_dirty = None if draft.revision == revision else draft.first_dirty
+            if draft.revision == revision:
+                self._drafts.pop(entry_id, None)  # fully saved; reload on next save
+
+    def forget(self, entry_id: str) -> None:
+        """A full update replaced the entry; discard any buffered draft."""
+        draft = self._drafts.pop(entry_id, None)
+        if draft is not None and draft.timer is not None:
+            draft.timer.cancel()
+
+    async def flush_all(self) -> None:
+        await asyncio.gather(*(self.flush(entry_id) for entry_id in list(self._drafts)), return_exceptions=True)
+
+
+@lru_cache
+def get_autosave() -> AutosaveBuffer:
+    settings = get_settings()
+    return AutosaveBuffer(settings.autosave_debounce_seconds, settings.autosave_max_delay_seconds)
@@ -0,0 +1,121 @@
+"""Process-wide snapshots of the global `templates` and `prompts` catalogs.
+
+The system rows are the same for every user, so each catalog is loaded once into an
+immutable snapshot holding the serialized JSON body and ETag for the full list and for
+every category. Requests read the current snapshot without touching the database. A
+background task polls `catalog_versions` (bumped by triggers on both tables) and rebuilds
+a snapshot only when its version changed; readers see the old or the new one, never a mix.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.db.supabase import get_supabase
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Body:
+    content: bytes
+    etag: str
+
+
+def _body(key: str, items: list[dict]) -> Body:
+    content = json.dumps({key: items}, separators=(",", ":"), default=str).encode()
+    # Weak: the compression middleware may gzip/br the body, and a strong ETag would then
+    # claim byte-identity across different encodings
+    return Body(content, f'W/"{hashlib.sha1(content).hexdigest()[:20]}"')
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: int | None
+    all: Body
+    by_category: dict[str, Body]
+    empty: Body
+
+    def body(self, category: str | None = None) -> Body:
+        if category is None:
+            return self.all
+        return self.by_category.get(category, self.empty)
+
+
+class Catalog:
+    def __init__(self, name: str, columns: str, order: str):
+        self.name = name
+        self.columns = columns
+        self.order = order
+        self.snapshot: Snapshot | None = None
+
+    def _version(self) -> int | None:
+        r = get_supabase().table("catalog_versions").select("version").eq("name", self.name).execute()
+        return r.data[0]["version"] if r.data else None
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rebuild the snapshot if the table changed (blocking); returns whether it was rebuilt."""
+        version = self._version()
+        if not force and self.snapshot is not None and version is not None and version == self.snapshot.version:
+            return False
+        r = get_supabase().table(self.name).select(self.columns).eq("is_system", True).order(self.order).execute()
+        rows = r.data or []
+        groups: dict[str, list[dict]] = {}
+        for row in rows:
+            groups.setdefault(row["category"], []).append(row)
+        self.snapshot = Snapshot(
+            version=version,
+            all=_body(self.name, rows),
+            by_category={c: _body(self.name, items) for c, items in groups.items()},
+            empty=_body(self.name, []),
+        )
+        return True
+
+    async def current(self) -> Snapshot:
+        if self.snapshot is None:
+            await run_in_threadpool(self.refresh)
+        return self.snapshot
+
+
+class CatalogRefresher:
+    def __init__(self, catalogs: list[Catalog], interval_seconds: float):
+        self.catalogs = catalogs
+        self.interval_seconds = interval_seconds
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            for catalog in self.catalogs:
+                try:
+                    if await run_in_threadpool(catalog.refresh):
+                        logger.info("%s catalog loaded (version %s)", catalog.name, catalog.snapshot.version)
+                except Exception:
+                    logger.exception("%s catalog refresh failed", catalog.name)
+            await asyncio.sleep(self.interval_seconds)
+
+
+templates = Catalog("templates", "id, name, description, category, structure, usage_count", "name")
+prompts = Catalog("prompts", "id, category, prompt_text, difficulty_level, tags", "created_at")
+
+
+@lru_cache
+def get_catalog_refresher() -> CatalogRefresher:
+    return CatalogRefresher([templates, prompts], get_settings().catalog_refresh_seconds)
@@ -0,0 +1,165 @@
+"""Resumable SSE framing for AI chat replies.
+
+The LLM call runs in its own task, decoupled from the HTTP connection, and appends
+frames to an in-memory stream. Token deltas are coalesced into one frame per
+`chat_frame_max_chars` characters or `chat_frame_max_delay_seconds`, whichever comes
+first. Every frame gets an id `<stream_id>:<seq>`; a client that drops can reconnect
+with `Last-Event-ID` and receive only what it missed, without a second LLM call, for
+`chat_resume_window_seconds` after the reply finishes. Idle subscribers get SSE comment
+heartbeats so proxies keep the connection open. Streams live in this process, so resume
+needs sticky routing with several workers.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Iterator
+
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from app.config import get_settings
+from app.core.errors import AIServiceError
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+@dataclass
+class ChatStream:
+    stream_id: str
+    user_id: str
+    frames: list[str] = field(default_factory=list)  # encoded SSE frames; seq = index + 1
+    done: bool = False
+    finished_at: float | None = None
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def append(self, payload: dict) -> None:
+        seq = len(self.frames) + 1
+        self.frames.append(f"id: {self.stream_id}:{seq}\ndata: {json.dumps(payload)}\n\n")
+        self._notify()
+
+    def finish(self) -> None:
+        self.done = True
+        self.finished_at = time.monotonic()
+        self._notify()
+
+    def _notify(self) -> None:
+        # Wake current waiters; later waiters pick up a fresh event
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+_streams: dict[str, ChatStream] = {}
+_producers: set[asyncio.Task] = set()  # strong refs so running producers are not collected
+
+
+def _expire() -> None:
+    window = get_settings().chat_resume_window_seconds
+    now = time.monotonic()
+    for stream_id in [k for k, s in _streams.items() if s.done and now - s.finished_at > window]:
+        del _streams[stream_id]
+
+
+def parse_last_event_id(value: str | None) -> tuple[str, int] | None:
+    """`<stream_id>:<seq>` -> (stream_id, seq); None for anything else."""
+    if not value or ":" not in value:
+        return None
+    stream_id, _, seq = value.rpartition(":")
+    return (stream_id, int(seq)) if seq.isdigit() else None
+
+
+def get_stream(stream_id: str, user_id: str) -> ChatStream | None:
+    _expire()
+    stream = _streams.get(stream_id)
+    return stream if stream is not None and stream.user_id == user_id else None
+
+
+def start_stream(user_id: str, deltas: Callable[[], Iterator[str]], on_complete: Callable[[str], None]) -> ChatStream:
+    """Run `deltas()` (a blocking token iterator) in the background; `on_complete` (blocking, run in
+    the threadpool) gets the full reply before the final frame is sent."""
+    _expire()
+    stream = ChatStream(uuid.uuid4().hex, user_id)
+    _streams[stream.stream_id] = stream
+    task = asyncio.create_task(_produce(stream, deltas, on_complete))
+    _producers.add(task)
+    task.add_done_callback(_producers.discard)
+    return stream
+
+
+async def _produce(stream: ChatStream, deltas: Callable[[], Iterator[str]], on_complete: Callable[[str], None]) -> None:
+    settings = get_settings()
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def read() -> None:
+        try:
+            async for delta in iterate_in_threadpool(deltas()):
+                await queue.put(delta)
+            await queue.put(_END)
+        except Exception as e:
+            await queue.put(e)
+
+    reader = asyncio.create_task(read())
+    full: list[str] = []
+    pending: list[str] = []
+    pending_chars = 0
+    deadline: float | None = None
+
+    def flush() -> None:
+        nonlocal pending, pending_chars, deadline
+        if pending:
+            stream.append({"content": "".join(pending)})
+        pending, pending_chars, deadline = [], 0, None
+
+    try:
+        while True:
+            timeout = None if deadline is None else max(deadline - loop.time(), 0)
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                flush()
+                continue
+            if item is _END:
+                flush()
+                try:
+                    await run_in_threadpool(on_complete, "".join(full))
+                except Exception:
+                    logger.exception("could not persist chat reply")
+                stream.append({"done": True})
+                break
+            if isinstance(item, Exception):
+                flush()
+                if not isinstance(item, AIServiceError):
+                    logger.error("chat stream failed", exc_info=item)
+                stream.append({"error": "AI temporarily unavailable"})
+                break
+            full.append(item)
+            pending.append(item)
+            pending_chars += len(item)
+            if pending_chars >= settings.chat_frame_max_chars:
+                flush()
+            elif deadline is None:
+                deadline = loop.time() + settings.chat_frame_max_delay_seconds
+    finally:
+        reader.cancel()
+        stream.finish()
+
+
+async def subscribe(stream: ChatStream, after: int = 0) -> AsyncIterator[str]:
+    """Frames with seq > `after`, then live frames until the reply ends, with heartbeats while idle."""
+    heartbeat = get_settings().sse_heartbeat_seconds
+    sent = after
+    while True:
+        changed = stream.changed
+        while sent < len(stream.frames):
+            yield stream.frames[sent]
+            sent += 1
+        if stream.done:
+            return
+        try:
+            await asyncio.wait_for(changed.wait(), heartbeat)
+        except asyncio.TimeoutError:
+            yield ": ping\n\n"
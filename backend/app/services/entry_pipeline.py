@@ -0,0 +1,124 @@
+"""Entry write-path stages: derive stored columns from content so read endpoints never re-tokenize."""
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.core.concurrency import fan_out
+from app.core.geo import geohash_encode
+from app.db.supabase import get_supabase
+from app.services import sentiment, text_stats
+
+logger = logging.getLogger(__name__)
+
+# Each stage maps content -> columns to persist on journal_entries
+STAGES = (text_stats.analyze, sentiment.analyze)
+GEOHASH_PRECISION = 9  # ~5 m cells; shorter prefixes give coarser cells for nearby / map queries
+
+
+def derive(content: str) -> dict:
+    out: dict = {}
+    for stage in STAGES:
+        out.update(stage(content))
+    return out
+
+
+def location_columns(lat: float | None, lng: float | None) -> dict:
+    """Geohash for the spatial index; cleared when either coordinate is missing."""
+    if lat is None or lng is None:
+        return {"geohash": None}
+    return {"geohash": geohash_encode(lat, lng, GEOHASH_PRECISION)}
+
+
+def _pending_derived(user_id: str, after: str | None, batch_size: int) -> list[tuple[str, dict]]:
+    """Next entries (by id) missing derived columns, with the columns computed (blocking, CPU)."""
+    q = get_supabase().table("journal_entries").select("id, content").eq("user_id", user_id).or_("sentiment_score.is.null,keywords.is.null")
+    if after:
+        q = q.gt("id", after)
+    rows = q.order("id").limit(batch_size).execute().data or []
+    return [(row["id"], derive(row.get("content") or "")) for row in rows]
+
+
+def _pending_geohash(user_id: str, after: str | None, batch_size: int) -> list[tuple[str, dict]]:
+    """Next located entries (by id) without a geohash, with the geohash computed (blocking)."""
+    q = get_supabase().table("journal_entries").select("id, location_lat, location_lng").eq("user_id", user_id).is_("geohash", "null").not_.is_("location_lat", "null").not_.is_("location_lng", "null")
+    if after:
+        q = q.gt("id", after)
+    rows = q.order("id").limit(batch_size).execute().data or []
+    return [(row["id"], location_columns(row["location_lat"], row["location_lng"])) for row in rows]
+
+
+@dataclass
+class BackfillJob:
+    status: str = "running"  # running | done | partial (hit max_batches) | failed
+    updated: int = 0
+    started_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+
+
+async def backfill(user_id: str, job: BackfillJob, batch_size: int, max_batches: int) -> None:
+    """Derive columns (including the geohash) for a user's entries written before they existed.
+
+    Each pass walks entries by id, so a row whose update doesn't take is not re-selected;
+    at most `max_batches` batches run per pass, and a later call picks up the rest.
+    """
+    supabase = get_supabase()
+    for pending in (_pending_derived, _pending_geohash):
+        after = None
+        for _ in range(max_batches):
+            rows = await run_in_threadpool(pending, user_id, after, batch_size)
+            if rows:
+                await fan_out(*(
+                    supabase.table("journal_entries").update(columns).eq("id", entry_id).eq("user_id", user_id).execute
+                    for entry_id, columns in rows
+                ))
+                job.updated += len(rows)
+                after = rows[-1][0]
+            if len(rows) < batch_size:
+                break
+        else:
+            job.status = "partial"
+    if job.status == "running":
+        job.status = "done"
+
+
+class BackfillJobs:
+    """Per-user backfills running in the background; at most one per user at a time."""
+
+    def __init__(self, batch_size: int, max_batches: int):
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.jobs: dict[str, BackfillJob] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def start(self, user_id: str) -> BackfillJob:
+        """Start a backfill for `user_id`, or return the one already running."""
+        if user_id in self._tasks:
+            return self.jobs[user_id]
+        job = self.jobs[user_id] = BackfillJob()
+        self._tasks[user_id] = asyncio.create_task(self._run(user_id, job))
+        return job
+
+    async def _run(self, user_id: str, job: BackfillJob) -> None:
+        try:
+            await backfill(user_id, job, self.batch_size, self.max_batches)
+        except Exception:
+            job.status = "failed"
+            logger.exception("backfill for user %s failed", user_id)
+        finally:
+            self._tasks.pop(user_id, None)
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks.values())
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@lru_cache
+def get_backfill_jobs() -> BackfillJobs:
+    settings = get_settings()
+    return BackfillJobs(settings.backfill_batch_size, settings.backfill_max_batches)
@@ -0,0 +1,23 @@
+"""Goal windows. Counters themselves are kept current by database triggers on entry writes."""
+from datetime import date, timedelta
+
+from app.core.errors import ValidationError
+
+
+def period_window(period: str, today: date | None = None) -> tuple[date, date]:
+    """Calendar week (Mon-Sun), month, quarter or year containing `today`."""
+    today = today or date.today()
+    if period == "week":
+        start = today - timedelta(days=today.weekday())
+        return start, start + timedelta(days=6)
+    if period == "month":
+        start = today.replace(day=1)
+    elif period == "quarter":
+        start = today.replace(month=(today.month - 1) // 3 * 3 + 1, day=1)
+    elif period == "year":
+        start = today.replace(month=1, day=1)
+    else:
+        raise ValidationError("Invalid period", field="period", constraint="enum")
+    months = {"month": 1, "quarter": 3, "year": 12}[period]
+    y, m = divmod(start.month - 1 + months, 12)
+    return start, date(start.year + y, m + 1, 1) - timedelta(days=1)
@@ -0,0 +1,231 @@
+"""Background generation of weekly/monthly reflection insights into `ai_insights`.
+
+Each run covers the last complete week or month. Active users are walked in
+`user_id` order in batches; progress (a cursor plus counters) is kept per period so
+an interrupted run resumes where it stopped, and the unique
+(user_id, insight_type, date_range_start) key makes re-runs idempotent. Users in a
+batch are processed by a small worker pool sharing one LLM rate limiter; each worker
+reads its own user's entries. Users whose generation failed are retried on later runs,
+up to `MAX_ATTEMPTS` times per period. Each run holds the "insights" job lease, renewed
+per batch, so with INSIGHTS_ENABLED on several workers only one generates at a time.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from functools import lru_cache
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.db.leases import release_lease, try_lease
+from app.db.supabase import get_supabase
+from app.services.ai_service import generate_reflection
+
+logger = logging.getLogger(__name__)
+
+INSIGHT_TYPES = ("weekly_reflection", "monthly_reflection")
+MAX_ATTEMPTS = 3
+_PAGE_SIZE = 1000  # PostgREST's default row cap
+_LEASE = "insights"
+_LEASE_SECONDS = 600.0  # renewed before every batch; lapses this long after a worker dies
+
+
+def period_range(insight_type: str, today: date | None = None) -> tuple[date, date]:
+    """Last complete Mon-Sun week or calendar month before `today`."""
+    today = today or date.today()
+    if insight_type == "weekly_reflection":
+        this_monday = today - timedelta(days=today.weekday())
+        return this_monday - timedelta(days=7), this_monday - timedelta(days=1)
+    end = today.replace(day=1) - timedelta(days=1)
+    return end.replace(day=1), end
+
+
+def _title(insight_type: str, start: date) -> str:
+    if insight_type == "weekly_reflection":
+        return f"Week of {start:%b} {start.day}"
+    return f"{start:%B %Y}"
+
+
+class RateLimiter:
+    """Async token bucket: at most `rate` acquisitions per `per` seconds across all workers."""
+
+    def __init__(self, rate: int, per: float = 60.0):
+        self.capacity = float(rate)
+        self.tokens = float(rate)
+        self.fill_rate = rate / per
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.fill_rate)
+
+
+@dataclass
+class JobProgress:
+    insight_type: str
+    start: date
+    end: date
+    cursor: str | None = None  # last user_id fully handled
+    generated: int = 0
+    skipped: int = 0
+    failed: int = 0  # users currently failed (retried on later runs)
+    done: bool = False
+    attempts: dict[str, int] = field(default_factory=dict)  # failed user_id -> attempts so far
+
+
+class InsightsRunner:
+    def __init__(self, batch_size: int, workers: int, llm_requests_per_minute: int, interval_seconds: int):
+        self.batch_size = batch_size
+        self.workers = workers
+        self.interval_seconds = interval_seconds
+        self.limiter = RateLimiter(llm_requests_per_minute)
+        self.progress: dict[tuple[str, date], JobProgress] = {}
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            try:
+                await run_in_threadpool(release_lease, _LEASE)
+            except Exception:
+                logger.exception("releasing the insights lease failed")
+
+    async def _loop(self) -> None:
+        while True:
+            for insight_type in INSIGHT_TYPES:
+                try:
+                    await self.run_period(insight_type)
+                except Exception:
+                    # Progress is kept; the next tick resumes from the cursor
+                    logger.exception("insights job %s failed", insight_type)
+            await asyncio.sleep(self.interval_seconds)
+
+    async def _hold_lease(self) -> bool:
+        return await run_in_threadpool(try_lease, _LEASE, _LEASE_SECONDS)
+
+    async def run_period(self, insight_type: str, today: date | None = None) -> JobProgress:
+        """Generate one period's insights; returns early, progress kept, if another worker holds the lease."""
+        start, end = period_range(insight_type, today)
+        prog = self.progress.setdefault((insight_type, start), JobProgress(insight_type, start, end))
+        retry = [u for u, n in prog.attempts.items() if n < MAX_ATTEMPTS]
+        for i in range(0, len(retry), self.batch_size):
+            if not await self._hold_lease():
+                return prog
+            await self._run_batch(prog, retry[i:i + self.batch_size])
+        while not prog.done:
+            if not await self._hold_lease():
+                return prog
+            users = await run_in_threadpool(self._active_users, start, end, prog.cursor)
+            if not users:
+                prog.done = True
+                break
+            await self._run_batch(prog, users)
+            prog.cursor = users[-1]
+        return prog
+
+    def _active_users(self, start: date, end: date, after: str | None) -> list[str]:
+        """Next `batch_size` distinct users with entries in the period, after `after` (blocking).
+
+        Pages by keyset on `user_id`, so a user with more rows than a page is skipped past
+        rather than filling the batch.
+        """
+        users: list[str] = []
+        while len(users) < self.batch_size:
+            q = get_supabase().table("journal_entries").select("user_id").gte("entry_date", str(start)).lte("entry_date", str(end)).is_("deleted_at", "null").eq("is_draft", False)
+            if after:
+                q = q.gt("user_id", after)
+            rows = q.order("user_id").limit(_PAGE_SIZE).execute().data or []
+            for row in rows:
+                if not users or users[-1] != row["user_id"]:
+                    users.append(row["user_id"])
+            if len(rows) < _PAGE_SIZE:
+                break
+            after = rows[-1]["user_id"]
+        return users[: self.batch_size]
+
+    async def _run_batch(self, prog: JobProgress, users: list[str]) -> None:
+        r = await run_in_threadpool(
+            get_supabase().table("ai_insights").select("user_id").eq("insight_type", prog.insight_type).eq("date_range_start", str(prog.start)).in_("user_id", users).execute
+        )
+        done = {row["user_id"] for row in (r.data or [])}
+        prog.skipped += sum(1 for u in done if u not in prog.attempts)
+        for user_id in done & prog.attempts.keys():
+            prog.attempts.pop(user_id)  # a retry that another run already completed
+            prog.failed -= 1
+        todo = [u for u in users if u not in done]
+        sem = asyncio.Semaphore(self.workers)
+
+        async def work(user_id: str) -> None:
+            async with sem:
+                try:
+                    entries = await run_in_threadpool(self._user_entries, prog, user_id)
+                    if not entries:
+                        prog.skipped += 1
+                        return
+                    await self.limiter.acquire()
+                    await run_in_threadpool(self._generate_one, prog, user_id, entries)
+                    prog.generated += 1
+                    if prog.attempts.pop(user_id, None) is not None:
+                        prog.failed -= 1
+                except Exception:
+                    if user_id not in prog.attempts:
+                        prog.failed += 1
+                    prog.attempts[user_id] = prog.attempts.get(user_id, 0) + 1
+                    logger.exception("insight %s for user %s failed (attempt %d)", prog.insight_type, user_id, prog.attempts[user_id])
+
+        await asyncio.gather(*(work(u) for u in todo))
+
+    @staticmethod
+    def _user_entries(prog: JobProgress, user_id: str) -> list[dict]:
+        """All of one user's entries in the period, paged past the row cap."""
+        entries: list[dict] = []
+        while True:
+            # A fresh builder per page: `range` adds params rather than replacing them
+            q = get_supabase().table("journal_entries").select("entry_date, mood, content").eq("user_id", user_id).gte("entry_date", str(prog.start)).lte("entry_date", str(prog.end)).is_("deleted_at", "null").eq("is_draft", False).order("entry_date").order("id")
+            rows = q.range(len(entries), len(entries) + _PAGE_SIZE - 1).execute().data or []
+            entries.extend(rows)
+            if len(rows) < _PAGE_SIZE:
+                return entries
+
+    @staticmethod
+    def _generate_one(prog: JobProgress, user_id: str, entries: list[dict]) -> None:
+        content = generate_reflection(entries, f"{prog.start} to {prog.end}")
+        content["entry_count"] = len(entries)
+        get_supabase().table("ai_insights").upsert({
+            "user_id": user_id,
+            "insight_type": prog.insight_type,
+            "title": _title(prog.insight_type, prog.start),
+            "content": content,
+            "date_range_start": str(prog.start),
+            "date_range_end": str(prog.end),
+        }, on_conflict="user_id,insight_type,date_range_start").execute()
+
+
+@lru_cache
+def get_insights_runner() -> InsightsRunner:
+    settings = get_settings()
+    return InsightsRunner(
+        batch_size=settings.insights_batch_size,
+        workers=settings.insights_workers,
+        llm_requests_per_minute=settings.insights_llm_requests_per_minute,
+        interval_seconds=settings.insights_interval_seconds,
+    )
@@ -0,0 +1,139 @@
+"""Background processing for entry media: thumbnails, audio duration and transcription.
+
+Completed uploads are queued by media id and handled by a few worker tasks. CPU work
+(decoding, resizing) runs in the process pool; storage and transcription calls run in
+the threadpool. Row `status` moves pending -> processing -> ready | failed, and rows
+left pending by a restart are re-queued by the startup warm-up. Finished
+transcriptions are copied into `journal_entries.media_text` so entry search covers them.
+"""
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Protocol
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.core.concurrency import run_in_process
+from app.db.supabase import get_supabase
+from app.services.media_processing import audio_duration, thumbnail
+
+logger = logging.getLogger(__name__)
+
+MEDIA_BUCKET = "journal-media"
+_PAGE_SIZE = 1000  # PostgREST's default row cap
+
+
+class Transcriber(Protocol):
+    def transcribe(self, data: bytes, file_name: str, mime_type: str) -> str | None: ...
+
+
+class StubTranscriber:
+    """Local stub: no speech-to-text, leaves `transcription` empty."""
+
+    def transcribe(self, data: bytes, file_name: str, mime_type: str) -> str | None:
+        return None
+
+
+class GroqTranscriber:
+    """Whisper via Groq's OpenAI-compatible audio API (uses GROQ_API_KEY)."""
+
+    def transcribe(self, data: bytes, file_name: str, mime_type: str) -> str | None:
+        from app.services.ai_service import _groq
+
+        r = _groq().audio.transcriptions.create(model=get_settings().groq_transcription_model, file=(file_name, data, mime_type))
+        return (r.text or "").strip() or None
+
+
+TRANSCRIBERS: dict[str, type] = {"stub": StubTranscriber, "groq": GroqTranscriber}
+
+
+class MediaProcessor:
+    def __init__(self, transcriber: Transcriber, workers: int):
+        self.transcriber = transcriber
+        self.workers = workers
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+
+    def enqueue(self, media_id: str) -> None:
+        self._queue.put_nowait(media_id)
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def requeue_pending(self) -> int:
+        """Re-queue rows a restart left pending or processing (run by warm-up, off the startup path)."""
+        queued = 0
+        while True:
+            # A fresh builder per page: `range` adds params rather than replacing them
+            query = get_supabase().table("entry_media").select("id").in_("status", ["pending", "processing"]).order("id")
+            r = await run_in_threadpool(query.range(queued, queued + _PAGE_SIZE - 1).execute)
+            for row in (r.data or []):
+                self.enqueue(row["id"])
+            queued += len(r.data or [])
+            if len(r.data or []) < _PAGE_SIZE:
+                return queued
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self) -> None:
+        while True:
+            media_id = await self._queue.get()
+            try:
+                await self.process(media_id)
+            except Exception:
+                logger.exception("media %s processing failed", media_id)
+                await run_in_threadpool(self._set, media_id, {"status": "failed"})
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _set(media_id: str, values: dict) -> None:
+        get_supabase().table("entry_media").update(values).eq("id", media_id).execute()
+
+    async def process(self, media_id: str) -> None:
+        supabase = get_supabase()
+        r = await run_in_threadpool(supabase.table("entry_media").select("*").eq("id", media_id).execute)
+        if not r.data:
+            return
+        row = r.data[0]
+        updates: dict = {"status": "ready"}
+        if row["media_type"] not in ("image", "audio"):
+            # Nothing is derived from video yet, so there is no reason to download it
+            await run_in_threadpool(self._set, media_id, updates)
+            return
+        await run_in_threadpool(self._set, media_id, {"status": "processing"})
+        bucket = supabase.storage.from_(row.get("storage_bucket") or MEDIA_BUCKET)
+        data = await run_in_threadpool(bucket.download, row["storage_path"])
+        if row["media_type"] == "image":
+            thumb = await run_in_process(thumbnail, data)
+            thumb_path = f"{row['storage_path']}.thumb.jpg"
+            await run_in_threadpool(bucket.upload, thumb_path, thumb, {"content-type": "image/jpeg", "upsert": "true"})
+            updates["thumbnail_path"] = thumb_path
+        elif row["media_type"] == "audio":
+            updates["duration"] = await run_in_process(audio_duration, data)
+            text = await run_in_threadpool(self.transcriber.transcribe, data, row.get("file_name") or "audio", row.get("mime_type") or "application/octet-stream")
+            if text:
+                updates["transcription"] = text
+        await run_in_threadpool(self._set, media_id, updates)
+        if updates.get("transcription"):
+            await run_in_threadpool(refresh_media_text, row["entry_id"])
+
+
+def refresh_media_text(entry_id: str) -> None:
+    """Copy all of an entry's transcriptions onto the entry so search (and search_vector) covers them."""
+    supabase = get_supabase()
+    r = supabase.table("entry_media").select("transcription").eq("entry_id", entry_id).not_.is_("transcription", "null").order("display_order").execute()
+    text = "\n".join(row["transcription"] for row in (r.data or []))
+    supabase.table("journal_entries").update({"media_text": text or None}).eq("id", entry_id).execute()
+
+
+@lru_cache
+def get_media_processor() -> MediaProcessor:
+    settings = get_settings()
+    return MediaProcessor(TRANSCRIBERS[settings.transcription_backend](), settings.media_workers)
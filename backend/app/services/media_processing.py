@@ -0,0 +1,63 @@
+"""Image and audio decoding. Functions here run in the process pool, so keep them picklable and pure."""
+import io
+
+MAX_IMAGE_PIXELS = 40_000_000
+
+
+def square_variants(data: bytes, sizes: list[int], quality: int = 85) -> dict[int, bytes]:
+    """Center-crop to a square and encode one JPEG per size. Raises ValueError for undecodable input."""
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    try:
+        img = Image.open(io.BytesIO(data))
+        img = ImageOps.exif_transpose(img)
+        img.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise ValueError(str(e)) from e
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    out = {}
+    for size in sizes:
+        variant = ImageOps.fit(img, (size, size), Image.Resampling.LANCZOS)
+        buf = io.BytesIO()
+        variant.save(buf, "JPEG", quality=quality, optimize=True, progressive=True)
+        out[size] = buf.getvalue()
+    return out
+
+
+def thumbnail(data: bytes, max_side: int = 320, quality: int = 80) -> bytes:
+    """Aspect-preserving JPEG thumbnail. Raises ValueError for undecodable input."""
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    try:
+        img = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+        img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise ValueError(str(e)) from e
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=quality, optimize=True)
+    return buf.getvalue()
+
+
+def audio_duration(data: bytes) -> int | None:
+    """Duration in whole seconds for WAV (stdlib); other formats if the optional `mutagen` is installed."""
+    import wave
+
+    try:
+        with wave.open(io.BytesIO(data)) as w:
+            return round(w.getnframes() / float(w.getframerate()))
+    except (wave.Error, EOFError, ZeroDivisionError):
+        pass
+    try:
+        import mutagen
+    except ImportError:
+        return None
+    try:
+        info = mutagen.File(io.BytesIO(data))
+    except Exception:
+        return None
+    return round(info.info.length) if info is not None and getattr(info, "info", None) else None
@@ -0,0 +1,106 @@
+"""Resumable chunked uploads for entry media.
+
+A session spools chunks to a temp file under `media_upload_dir`. Each chunk names the
+offset it starts at; a client that lost its connection asks for the session's
+`received` count and continues from there. A per-session lock serializes chunks (and
+completion), so two requests for the same offset can't both pass the check and
+interleave their writes. Sessions live in this process (use sticky
+routing with several workers) and expire after `media_upload_ttl_seconds`.
+"""
+import asyncio
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.core.errors import ConflictError, NotFoundError, ValidationError
+
+MEDIA_TYPES = ("image", "audio", "video")
+
+
+@dataclass
+class UploadSession:
+    upload_id: str
+    user_id: str
+    entry_id: str
+    media_type: str
+    file_name: str
+    mime_type: str
+    total_size: int
+    path: str
+    received: int = 0
+    created: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def public(self) -> dict:
+        return {
+            "upload_id": self.upload_id,
+            "entry_id": self.entry_id,
+            "file_name": self.file_name,
+            "total_size": self.total_size,
+            "received": self.received,
+        }
+
+
+_sessions: dict[str, UploadSession] = {}
+
+
+def _expire() -> None:
+    ttl = get_settings().media_upload_ttl_seconds
+    now = time.monotonic()
+    for upload_id in [k for k, s in _sessions.items() if now - s.created > ttl]:
+        discard(_sessions[upload_id])
+
+
+def create(user_id: str, entry_id: str, media_type: str, file_name: str, mime_type: str, total_size: int) -> UploadSession:
+    settings = get_settings()
+    if media_type not in MEDIA_TYPES:
+        raise ValidationError("Invalid media_type", field="media_type", constraint="enum")
+    if not 0 < total_size <= settings.media_max_bytes:
+        raise ValidationError(f"total_size must be between 1 and {settings.media_max_bytes} bytes", field="total_size", constraint="max_size")
+    _expire()
+    os.makedirs(settings.media_upload_dir, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    path = os.path.join(settings.media_upload_dir, upload_id)
+    open(path, "wb").close()
+    session = UploadSession(upload_id, user_id, entry_id, media_type, os.path.basename(file_name) or "file", mime_type, total_size, path)
+    _sessions[upload_id] = session
+    return session
+
+
+def get(upload_id: str, user_id: str, entry_id: str) -> UploadSession:
+    session = _sessions.get(upload_id)
+    if session is None or session.user_id != user_id or session.entry_id != entry_id:
+        raise NotFoundError("Upload not found or expired")
+    return session
+
+
+async def append(session: UploadSession, offset: int, chunks: AsyncIterator[bytes]) -> None:
+    """Write a chunk that starts at `offset`; it must continue exactly where the session left off."""
+    async with session.lock:
+        if offset != session.received:
+            raise ConflictError("Chunk offset does not match received bytes", {"received": session.received})
+        # File I/O runs in the threadpool so a slow disk never stalls the event loop
+        f = await run_in_threadpool(open, session.path, "r+b")
+        try:
+            await run_in_threadpool(f.seek, offset)
+            async for chunk in chunks:
+                if session.received + len(chunk) > session.total_size:
+                    await run_in_threadpool(f.truncate, session.received)
+                    raise ValidationError("Chunk exceeds declared total_size", field="total_size", constraint="max_size")
+                await run_in_threadpool(f.write, chunk)
+                session.received += len(chunk)
+        finally:
+            await run_in_threadpool(f.close)
+
+
+def discard(session: UploadSession) -> None:
+    _sessions.pop(session.upload_id, None)
+    try:
+        os.remove(session.path)
+    except FileNotFoundError:
+        pass
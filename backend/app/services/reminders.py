@@ -0,0 +1,205 @@
+"""Journaling reminder scheduler driven by `user_preferences`.
+
+Each reminder-enabled user has one entry in a min-heap keyed on the next fire time
+(UTC, computed in the user's time zone). A tick pops only what is due, writes the
+`notifications` rows in one batch, pushes through the configured backend and
+re-queues the next occurrence. Preferences are loaded once in pages, then kept
+current incrementally: changes made through this process are applied directly and
+other writers' changes are picked up by polling rows with a newer `updated_at`.
+Only the worker holding the "reminders" job lease (renewed every tick) delivers, so
+users are not notified twice when REMINDERS_ENABLED is on in several workers; the
+others keep their heaps current and drop what falls due, ready to take over.
+"""
+import asyncio
+import heapq
+import logging
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Protocol
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.db.leases import release_lease, try_lease
+from app.db.supabase import get_supabase
+
+logger = logging.getLogger(__name__)
+
+DAY_KEYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+_PAGE_SIZE = 1000
+_LEASE = "reminders"
+_LEASE_TICKS = 4  # the lease outlives this many missed ticks before another worker takes over
+
+
+class PushBackend(Protocol):
+    def send(self, tokens: list[str], title: str, body: str, data: dict) -> None: ...
+
+
+class LogPushBackend:
+    """Local stub: logs instead of calling a push provider."""
+
+    def send(self, tokens: list[str], title: str, body: str, data: dict) -> None:
+        logger.info("push to %d device(s): %s", len(tokens), title)
+
+
+PUSH_BACKENDS: dict[str, type] = {"log": LogPushBackend}
+
+
+@dataclass
+class ReminderSpec:
+    at: time
+    days: frozenset[int]  # 0 = Monday
+    tz: ZoneInfo
+    version: int = 0
+
+
+def _zone(name: str | None) -> ZoneInfo:
+    try:
+        return ZoneInfo(name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo("UTC")
+
+
+def spec_from_row(row: dict) -> ReminderSpec | None:
+    if not row.get("reminder_enabled", True) or not row.get("reminder_time"):
+        return None
+    hh, mm = str(row["reminder_time"]).split(":")[:2]
+    days = row.get("reminder_days") or list(DAY_KEYS)
+    day_set = frozenset(DAY_KEYS.index(d) for d in days if d in DAY_KEYS)
+    if not day_set:
+        return None
+    return ReminderSpec(time(int(hh), int(mm)), day_set, _zone(row.get("timezone")))
+
+
+def next_fire(spec: ReminderSpec, after: datetime) -> datetime:
+    """First reminder instant strictly after `after` (UTC), honoring the user's local days and DST."""
+    local_today = after.astimezone(spec.tz).date()
+    for offset in range(8):
+        d = local_today + timedelta(days=offset)
+        if d.weekday() not in spec.days:
+            continue
+        fire = datetime.combine(d, spec.at, tzinfo=spec.tz).astimezone(timezone.utc)
+        if fire > after:
+            return fire
+    raise ValueError("reminder spec has no days")
+
+
+class ReminderScheduler:
+    def __init__(self, push: PushBackend, tick_seconds: float, sync_seconds: float):
+        self.push = push
+        self.tick_seconds = tick_seconds
+        self.sync_seconds = sync_seconds
+        self._specs: dict[str, ReminderSpec] = {}
+        self._heap: list[tuple[float, str, int]] = []  # (fire ts, user_id, spec version)
+        self._watermark: str | None = None  # max updated_at seen
+        self._version = 0
+        self._task: asyncio.Task | None = None
+
+    def upsert(self, user_id: str, row: dict, now: datetime | None = None) -> None:
+        """Apply one user's preference row; stale heap entries are skipped via the version."""
+        self._specs.pop(user_id, None)
+        spec = spec_from_row(row)
+        if spec is None:
+            return
+        self._version += 1
+        spec.version = self._version
+        self._specs[user_id] = spec
+        fire = next_fire(spec, now or datetime.now(timezone.utc))
+        heapq.heappush(self._heap, (fire.timestamp(), user_id, spec.version))
+
+    def _fetch_changed(self, since: str | None) -> list[dict]:
+        """Page through preference rows changed after `since` (all enabled rows when None)."""
+        supabase = get_supabase()
+        rows: list[dict] = []
+        while True:
+            q = supabase.table("user_preferences").select("user_id, reminder_enabled, reminder_time, reminder_days, timezone, updated_at")
+            if since:
+                q = q.gt("updated_at", since)
+            else:
+                q = q.eq("reminder_enabled", True)
+            page = q.order("updated_at").range(len(rows), len(rows) + _PAGE_SIZE - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < _PAGE_SIZE:
+                return rows
+
+    async def _sync(self) -> None:
+        # Fetch off the loop, apply on it, so route-driven upserts never race the heap
+        rows = await run_in_threadpool(self._fetch_changed, self._watermark)
+        for row in rows:
+            self.upsert(row["user_id"], row)
+            if row.get("updated_at") and (self._watermark is None or row["updated_at"] > self._watermark):
+                self._watermark = row["updated_at"]
+
+    def pop_due(self, now: datetime) -> list[str]:
+        """Users whose reminder is due; their next occurrence is queued before returning."""
+        due = []
+        ts = now.timestamp()
+        while self._heap and self._heap[0][0] <= ts:
+            _, user_id, version = heapq.heappop(self._heap)
+            spec = self._specs.get(user_id)
+            if spec is None or spec.version != version:
+                continue
+            due.append(user_id)
+            heapq.heappush(self._heap, (next_fire(spec, now).timestamp(), user_id, version))
+        return due
+
+    def _deliver(self, user_ids: list[str], now: datetime) -> None:
+        supabase = get_supabase()
+        title, body = "Time to journal", "Take a few minutes to reflect on your day."
+        sent_at = now.isoformat()
+        supabase.table("notifications").insert([
+            {"user_id": u, "type": "reminder", "title": title, "body": body, "action_url": "/entries/new", "scheduled_for": sent_at, "sent_at": sent_at}
+            for u in user_ids
+        ]).execute()
+        tokens_r = supabase.table("device_tokens").select("user_id, token").in_("user_id", user_ids).execute()
+        tokens = [row["token"] for row in (tokens_r.data or [])]
+        if tokens:
+            self.push.send(tokens, title, body, {"type": "reminder"})
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            try:
+                await run_in_threadpool(release_lease, _LEASE)
+            except Exception:
+                logger.exception("releasing the reminders lease failed")
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        last_sync = None
+        while True:
+            try:
+                if last_sync is None or loop.time() - last_sync >= self.sync_seconds:
+                    await self._sync()
+                    last_sync = loop.time()
+                leader = await run_in_threadpool(try_lease, _LEASE, self.tick_seconds * _LEASE_TICKS)
+                now = datetime.now(timezone.utc)
+                due = self.pop_due(now)
+                if not leader:
+                    due = []  # the lease holder delivers these
+                for i in range(0, len(due), _PAGE_SIZE):
+                    await run_in_threadpool(self._deliver, due[i:i + _PAGE_SIZE], now)
+            except Exception:
+                logger.exception("reminder tick failed")
+            await asyncio.sleep(self.tick_seconds)
+
+
+@lru_cache
+def get_reminder_scheduler() -> ReminderScheduler:
+    settings = get_settings()
+    return ReminderScheduler(
+        push=PUSH_BACKENDS[settings.push_backend](),
+        tick_seconds=settings.reminders_tick_seconds,
+        sync_seconds=settings.reminders_sync_seconds,
+    )
@@ -0,0 +1,85 @@
+"""Offline lexicon-based sentiment scoring for journal entries (no network, no LLM).
+
+A small valence lexicon with negation and intensifier handling, normalized the way
+VADER does (sum / sqrt(sum^2 + alpha)) into a score in [-1, 1], then mapped onto
+MOOD_VALUES and a 1-10 intensity.
+"""
+import math
+import re
+
+_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+_ALPHA = 15.0
+_NEGATION_WINDOW = 3
+
+_LEXICON: dict[str, float] = {
+    # positive
+    "amazing": 3.0, "awesome": 3.0, "beautiful": 2.5, "best": 2.5, "blessed": 2.5, "blissful": 3.0,
+    "bright": 1.5, "calm": 1.8, "celebrate": 2.5, "cheerful": 2.5, "comfortable": 1.5, "confident": 2.0,
+    "content": 1.5, "delighted": 3.0, "energized": 2.0, "enjoy": 2.0, "enjoyed": 2.0, "excited": 2.5,
+    "fantastic": 3.0, "fine": 0.8, "fun": 2.0, "glad": 2.0, "good": 1.8, "grateful": 2.5,
+    "great": 2.5, "happy": 2.7, "hope": 1.5, "hopeful": 2.0, "inspired": 2.5, "joy": 3.0,
+    "joyful": 3.0, "kind": 1.5, "laugh": 2.0, "laughed": 2.0, "love": 3.0, "loved": 3.0,
+    "lovely": 2.5, "lucky": 2.0, "nice": 1.8, "optimistic": 2.0, "peaceful": 2.5, "pleased": 2.0,
+    "productive": 1.8, "proud": 2.5, "relaxed": 2.0, "relieved": 2.0, "rested": 1.5, "satisfied": 2.0,
+    "smile": 2.0, "smiled": 2.0, "strong": 1.5, "success": 2.5, "successful": 2.5, "thankful": 2.5,
+    "thrilled": 3.0, "wonderful": 3.0, "accomplished": 2.5, "better": 1.5, "connected": 1.5, "motivated": 2.0,
+    # negative
+    "afraid": -2.5, "alone": -1.8, "angry": -2.7, "annoyed": -2.0, "anxious": -2.5, "ashamed": -2.5,
+    "awful": -3.0, "bad": -2.0, "bored": -1.5, "broken": -2.5, "cried": -2.5, "cry": -2.3,
+    "depressed": -3.0, "disappointed": -2.3, "down": -1.2, "drained": -2.0, "dread": -2.5, "empty": -2.0,
+    "exhausted": -2.2, "fail": -2.5, "failed": -2.5, "failure": -2.7, "fear": -2.5, "frustrated": -2.3,
+    "guilty": -2.2, "hate": -3.0, "hopeless": -3.0, "hurt": -2.5, "irritated": -2.0, "lonely": -2.5,
+    "lost": -1.8, "miserable": -3.0, "nervous": -2.0, "overwhelmed": -2.3, "pain": -2.3, "panic": -2.7,
+    "regret": -2.2, "sad": -2.5, "scared": -2.5, "sick": -1.8, "stress": -2.0, "stressed": -2.3,
+    "struggle": -1.8, "struggling": -2.0, "terrible": -3.0, "tired": -1.5, "upset": -2.3, "worried": -2.2,
+    "worry": -2.0, "worse": -2.0, "worst": -3.0, "grief": -3.0, "heartbroken": -3.0,
+}
+_NEGATORS = frozenset({"not", "no", "never", "nothing", "hardly", "barely", "without", "nobody", "neither", "nor"})
+_BOOSTERS: dict[str, float] = {
+    "very": 0.3, "really": 0.3, "so": 0.25, "extremely": 0.5, "incredibly": 0.5, "super": 0.35,
+    "totally": 0.3, "truly": 0.3, "slightly": -0.3, "somewhat": -0.25, "kinda": -0.25, "little": -0.2,
+}
+
+
+def score_text(text: str) -> float:
+    """Sentiment in [-1, 1]; 0 for text with no lexicon hits."""
+    tokens = _TOKEN.findall(text.lower())
+    total = 0.0
+    for i, tok in enumerate(tokens):
+        valence = _LEXICON.get(tok)
+        if valence is None:
+            continue
+        prev = tokens[max(0, i - _NEGATION_WINDOW):i]
+        if prev:
+            boost = _BOOSTERS.get(prev[-1])
+            if boost:
+                valence += boost if valence > 0 else -boost
+            if any(p in _NEGATORS or p.endswith("n't") for p in prev):
+                valence *= -0.74
+        total += valence
+    if not total:
+        return 0.0
+    return total / math.sqrt(total * total + _ALPHA)
+
+
+def mood_from_score(score: float) -> tuple[str, int]:
+    """Map a score onto (mood, mood_intensity 1-10)."""
+    if score <= -0.6:
+        mood = "very_sad"
+    elif score <= -0.2:
+        mood = "sad"
+    elif score < 0.2:
+        mood = "neutral"
+    elif score < 0.6:
+        mood = "happy"
+    else:
+        mood = "very_happy"
+    return mood, max(1, min(10, round(1 + 9 * abs(score))))
+
+
+def analyze(text: str) -> dict:
+    """Columns persisted on journal_entries at write time."""
+    score = score_text(text)
+    mood, intensity = mood_from_score(score)
+    return {"sentiment_score": round(score, 4), "inferred_mood": mood, "inferred_mood_intensity": intensity}
+
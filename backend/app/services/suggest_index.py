@@ -0,0 +1,130 @@
+"""Per-user prefix index (sorted array + bisect) for tag and past-query autocomplete.
+
+Warmed lazily from `tags` and `search_history`, updated in place on tag writes and
+searches, and evicted LRU or after a TTL so other workers' writes are picked up.
+"""
+import math
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import datetime
+
+from app.config import get_settings
+from app.core.concurrency import fan_out
+from app.db.supabase import get_supabase
+
+# Recency half-life for ranking: a term used a week ago counts half as much as one used now
+_HALF_LIFE_SECONDS = 7 * 24 * 3600
+_WARM_HISTORY_LIMIT = 500
+
+
+def _ts(value) -> float:
+    if not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return 0.0
+
+
+class PrefixIndex:
+    """Sorted-array prefix index of one user's terms with frequency/recency stats."""
+
+    def __init__(self):
+        self._keys: list[str] = []
+        self._terms: dict[str, list] = {}  # key -> [display text, kind, count, last_used_ts]
+        self.loaded_at = time.monotonic()
+
+    def add(self, text: str, kind: str, count: int = 1, last_used: float | None = None) -> None:
+        text = text.strip()
+        if not text:
+            return
+        key = text.lower()
+        last_used = last_used if last_used is not None else time.time()
+        term = self._terms.get(key)
+        if term is None:
+            self._terms[key] = [text, kind, count, last_used]
+            insort(self._keys, key)
+            return
+        term[2] += count
+        term[3] = max(term[3], last_used)
+        if kind == "tag":
+            # A tag and a past query with the same text surface once, as the tag
+            term[0], term[1] = text, kind
+
+    def remove(self, text: str) -> None:
+        key = text.strip().lower()
+        term = self._terms.get(key)
+        if term is None or term[1] != "tag":
+            return
+        del self._terms[key]
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            del self._keys[i]
+
+    def lookup(self, prefix: str, limit: int = 10) -> list[dict]:
+        prefix = prefix.strip().lower()
+        now = time.time()
+        hits = []
+        i = bisect_left(self._keys, prefix)
+        while i < len(self._keys) and self._keys[i].startswith(prefix):
+            text, kind, count, last_used = self._terms[self._keys[i]]
+            decay = 0.5 ** (max(now - last_used, 0) / _HALF_LIFE_SECONDS)
+            hits.append((math.log1p(count) * (0.25 + decay), text, kind))
+            i += 1
+        hits.sort(key=lambda h: h[0], reverse=True)
+        return [{"text": text, "kind": kind} for _, text, kind in hits[:limit]]
+
+
+_indexes: "OrderedDict[str, PrefixIndex]" = OrderedDict()
+
+
+async def _warm(user_id: str) -> PrefixIndex:
+    supabase = get_supabase()
+    idx = PrefixIndex()
+    tags_r, hist_r = await fan_out(
+        supabase.table("tags").select("tag, usage_count, last_used_at").eq("user_id", user_id).execute,
+        supabase.table("search_history").select("query, searched_at").eq("user_id", user_id).order("searched_at", desc=True).limit(_WARM_HISTORY_LIMIT).execute,
+    )
+    for row in (tags_r.data or []):
+        idx.add(row["tag"], "tag", row.get("usage_count") or 1, _ts(row.get("last_used_at")))
+    for row in (hist_r.data or []):
+        idx.add(row["query"], "query", 1, _ts(row.get("searched_at")))
+    return idx
+
+
+async def get_index(user_id: str) -> PrefixIndex:
+    """Return the user's index, warming it from the database on first use or after the TTL."""
+    settings = get_settings()
+    idx = _indexes.get(user_id)
+    if idx is not None and time.monotonic() - idx.loaded_at < settings.suggest_index_ttl_seconds:
+        _indexes.move_to_end(user_id)
+        return idx
+    idx = await _warm(user_id)
+    _indexes[user_id] = idx
+    _indexes.move_to_end(user_id)
+    while len(_indexes) > settings.suggest_index_max_users:
+        _indexes.popitem(last=False)
+    return idx
+
+
+def record_tags(user_id: str, tags: list[str] | None, count: int = 1) -> None:
+    """Apply a tag write to an already-warm index (cold indexes pick it up when warmed)."""
+    idx = _indexes.get(user_id)
+    if idx is not None:
+        for tag in tags or []:
+            idx.add(tag, "tag", count)
+
+
+def forget_tags(user_id: str, tags: list[str]) -> None:
+    """Drop renamed, merged or deleted tags from an already-warm index."""
+    idx = _indexes.get(user_id)
+    if idx is not None:
+        for tag in tags:
+            idx.remove(tag)
+
+
+def record_query(user_id: str, query: str) -> None:
+    idx = _indexes.get(user_id)
+    if idx is not None:
+        idx.add(query, "query")
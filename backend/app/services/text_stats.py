@@ -0,0 +1,37 @@
+"""Text statistics for journal entries, computed once at write time."""
+import math
+import re
+from collections import Counter
+
+# CJK ideographs and kana count as one word each (those scripts don't separate words with spaces);
+# everything else is a run of letters/digits, keeping inner apostrophes ("don't", "l’été").
+_WORD = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]|[^\W_]+(?:['’][^\W_]+)*")
+_SENTENCE_BREAK = re.compile(r"[.!?。！？…]+")
+WORDS_PER_MINUTE = 230
+MAX_KEYWORDS = 25
+
+STOP_WORDS = frozenset({
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "is", "it", "i", "my",
+    "me", "we", "you", "they", "this", "that", "was", "were", "are", "be", "been", "have", "has", "had", "not",
+    "so", "just", "its", "it's", "i'm", "im", "from", "about", "what", "when", "then", "than", "there", "their",
+    "our", "your", "his", "her", "she", "him", "them", "all", "can", "did", "does", "do", "would", "could",
+    "will", "out", "too", "very", "really", "also", "some", "into", "who", "how", "which", "more", "like",
+})
+
+
+def analyze(content: str) -> dict:
+    """Columns persisted on journal_entries: counts, reading time and top keywords ({word: count})."""
+    words = _WORD.findall(content)
+    lowered = [w.lower() for w in words]
+    sentences = sum(1 for part in _SENTENCE_BREAK.split(content) if _WORD.search(part))
+    keywords = Counter(
+        w for w in lowered if len(w) >= 3 and w not in STOP_WORDS and not w.isdigit()
+    ).most_common(MAX_KEYWORDS)
+    return {
+        "word_count": len(words),
+        "character_count": len(content),
+        "reading_time_seconds": math.ceil(len(words) * 60 / WORDS_PER_MINUTE),
+        "sentence_count": sentences,
+        "unique_word_count": len(set(lowered)),
+        "keywords": dict(keywords),
+    }
@@ -0,0 +1,92 @@
+"""Hard-delete entries that have sat in the trash past the retention window.
+
+Expired entries are taken oldest-first in bounded batches: their media files are
+removed from storage, then the entry rows are deleted (entry_tags and entry_media
+rows go with them via ON DELETE CASCADE). Each batch is a few short requests, and the
+job pauses between batches so a large backlog never monopolises the database.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.db.supabase import get_supabase
+from app.services.media_pipeline import MEDIA_BUCKET
+
+logger = logging.getLogger(__name__)
+
+_BATCH_PAUSE_SECONDS = 0.5
+
+
+def retention_cutoff(now: datetime | None = None) -> datetime:
+    """Entries deleted before this instant are past the retention window."""
+    return (now or datetime.now(timezone.utc)) - timedelta(days=get_settings().trash_retention_days)
+
+
+def purge_batch(cutoff: datetime, batch_size: int) -> int:
+    """Purge up to `batch_size` entries deleted before `cutoff`; returns how many were removed."""
+    supabase = get_supabase()
+    r = supabase.table("journal_entries").select("id").lt("deleted_at", cutoff.isoformat()).order("deleted_at").limit(batch_size).execute()
+    ids = [row["id"] for row in (r.data or [])]
+    if not ids:
+        return 0
+    media_r = supabase.table("entry_media").select("storage_bucket, storage_path, thumbnail_path").in_("entry_id", ids).execute()
+    by_bucket: dict[str, list[str]] = {}
+    for m in (media_r.data or []):
+        paths = by_bucket.setdefault(m.get("storage_bucket") or MEDIA_BUCKET, [])
+        paths.extend(p for p in (m["storage_path"], m.get("thumbnail_path")) if p)
+    # Files first: if this fails the rows stay and the next run retries them
+    for bucket, paths in by_bucket.items():
+        supabase.storage.from_(bucket).remove(paths)
+    supabase.table("journal_entries").delete().in_("id", ids).lt("deleted_at", cutoff.isoformat()).execute()
+    return len(ids)
+
+
+class TrashPurger:
+    def __init__(self, interval_seconds: float, batch_size: int):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._task: asyncio.Task | None = None
+
+    async def run_once(self) -> int:
+        """Drain everything currently expired, one batch at a time."""
+        cutoff = retention_cutoff()
+        total = 0
+        while True:
+            n = await run_in_threadpool(purge_batch, cutoff, self.batch_size)
+            total += n
+            if n < self.batch_size:
+                return total
+            await asyncio.sleep(_BATCH_PAUSE_SECONDS)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                purged = await self.run_once()
+                if purged:
+                    logger.info("purged %d expired entries from trash", purged)
+            except Exception:
+                logger.exception("trash purge failed")
+            await asyncio.sleep(self.interval_seconds)
+
+
+@lru_cache
+def get_trash_purger() -> TrashPurger:
+    settings = get_settings()
+    return TrashPurger(settings.trash_purge_interval_seconds, settings.trash_purge_batch_size)
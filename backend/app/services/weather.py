@@ -0,0 +1,171 @@
+"""Weather enrichment for new entries that carry coordinates.
+
+Entry creation only enqueues the entry; a background task fills `weather` later, so the
+request never waits on the provider. The task collects queued entries for a short
+window, groups them by (geohash cell, hour) so nearby entries share one lookup, serves
+known cells from an LRU cache, fetches the rest concurrently and writes each group with
+a single update. Providers return current conditions, so only entries dated today are
+enriched, and weather the user supplied is never overwritten.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Protocol
+
+from app.config import get_settings
+from app.core.concurrency import fan_out
+from app.core.geo import geohash_encode
+from app.db.supabase import get_supabase
+
+logger = logging.getLogger(__name__)
+
+
+class WeatherProvider(Protocol):
+    def current(self, lat: float, lng: float) -> dict | None: ...
+
+
+class StubWeatherProvider:
+    """Local stub: no weather lookups, entries keep `weather` empty."""
+
+    def current(self, lat: float, lng: float) -> dict | None:
+        return None
+
+
+class OpenWeatherProvider:
+    """OpenWeather current conditions (uses OPENWEATHER_API_KEY)."""
+
+    URL = "https://api.openweathermap.org/data/2.5/weather"
+
+    def current(self, lat: float, lng: float) -> dict | None:
+        api_key = get_settings().openweather_api_key
+        if not api_key:
+            return None
+        import httpx
+
+        r = httpx.get(self.URL, params={"lat": lat, "lon": lng, "appid": api_key, "units": "metric"}, timeout=10)
+        r.raise_for_status()
+        data = r.json()
+        conditions = data.get("weather") or [{}]
+        return {
+            "condition": conditions[0].get("main"),
+            "description": conditions[0].get("description"),
+            "icon": conditions[0].get("icon"),
+            "temp_c": data.get("main", {}).get("temp"),
+            "humidity": data.get("main", {}).get("humidity"),
+            "wind_speed": data.get("wind", {}).get("speed"),
+            "source": "openweather",
+        }
+
+
+WEATHER_PROVIDERS: dict[str, type] = {"stub": StubWeatherProvider, "openweather": OpenWeatherProvider}
+
+
+class WeatherEnricher:
+    def __init__(self, provider: WeatherProvider, precision: int, cache_size: int, batch_size: int, window_seconds: float, concurrency: int):
+        self.provider = provider
+        self.precision = precision
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self.window_seconds = window_seconds
+        self.concurrency = concurrency
+        self._cache: OrderedDict[tuple[str, str], dict | None] = OrderedDict()
+        self._queue: asyncio.Queue[tuple[str, float, float]] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+
+    def enqueue(self, entry_id: str, lat: float, lng: float) -> None:
+        self._queue.put_nowait((entry_id, lat, lng))
+
+    def _cached(self, key: tuple[str, str]) -> tuple[bool, dict | None]:
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return True, self._cache[key]
+        return False, None
+
+    def _remember(self, key: tuple[str, str], weather: dict | None) -> None:
+        self._cache[key] = weather
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _next_batch(self) -> list[tuple[str, float, float]]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window_seconds
+        while len(batch) < self.batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _lookup(self, lat: float, lng: float) -> tuple[bool, dict | None]:
+        try:
+            return True, self.provider.current(lat, lng)
+        except Exception:
+            logger.exception("weather lookup failed")
+            return False, None
+
+    async def enrich(self, batch: list[tuple[str, float, float]]) -> None:
+        hour = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H")
+        groups: dict[tuple[str, str], list[str]] = {}
+        coords: dict[tuple[str, str], tuple[float, float]] = {}
+        for entry_id, lat, lng in batch:
+            key = (geohash_encode(lat, lng, self.precision), hour)
+            groups.setdefault(key, []).append(entry_id)
+            coords.setdefault(key, (lat, lng))
+        # One provider call per uncached cell, however many entries fall in it
+        misses = [key for key in groups if not self._cached(key)[0]]
+        if misses:
+            results = await fan_out(*(
+                (lambda c=coords[key]: self._lookup(*c)) for key in misses
+            ), limit=self.concurrency)
+            for key, (ok, weather) in zip(misses, results):
+                if ok:  # provider errors are not cached; a later entry in the cell retries
+                    self._remember(key, weather)
+        supabase = get_supabase()
+        writes = []
+        for key, entry_ids in groups.items():
+            weather = self._cached(key)[1]
+            if weather:
+                writes.append(supabase.table("journal_entries").update({"weather": weather}).in_("id", entry_ids).is_("weather", "null").execute)
+        if writes:
+            await fan_out(*writes)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self.enrich(batch)
+            except Exception:
+                logger.exception("weather enrichment failed for %d entries", len(batch))
+
+
+@lru_cache
+def get_weather_enricher() -> WeatherEnricher:
+    settings = get_settings()
+    return WeatherEnricher(
+        provider=WEATHER_PROVIDERS[settings.weather_provider](),
+        precision=settings.weather_geohash_precision,
+        cache_size=settings.weather_cache_max_entries,
+        batch_size=settings.weather_batch_size,
+        window_seconds=settings.weather_batch_window_seconds,
+        concurrency=settings.weather_fetch_concurrency,
+    )
@@ -0,0 +1,127 @@
+"""Write-behind queue for non-critical writes (search history, last-login upserts).
+
+Writes are buffered in process and flushed in batches when the buffer reaches
+`write_behind_batch_size` or every `write_behind_flush_interval_seconds`, whichever
+comes first. Rows for the same table/op/columns become one bulk insert or upsert.
+The buffer is bounded: on overflow it drops the oldest (or newest) write per
+`write_behind_overflow`. Call `submit` from the event loop thread. Nothing reads these
+rows back within a request, so anything that must be read-your-writes does not belong here.
+"""
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from app.config import get_settings
+from app.core.concurrency import fan_out
+from app.db.supabase import get_supabase
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class _Write:
+    table: str
+    op: str  # insert | upsert
+    row: dict[str, Any]
+    on_conflict: str | None = None
+    key: Any = None  # writes sharing a key within one flush collapse to the latest
+
+
+def _execute(table: str, op: str, on_conflict: str | None, rows: list[dict]) -> None:
+    t = get_supabase().table(table)
+    if op == "upsert":
+        t.upsert(rows, on_conflict=on_conflict or "id").execute()
+    else:
+        t.insert(rows).execute()
+
+
+class WriteBehindQueue:
+    def __init__(self, max_buffer: int, batch_size: int, flush_interval: float, overflow: str = "drop_oldest"):
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.dropped = 0
+        self._buffer: deque[_Write] = deque()
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    def submit(self, table: str, row: dict[str, Any], op: str = "insert", on_conflict: str | None = None, key: Any = None) -> bool:
+        """Buffer a write; returns False if it was dropped because the buffer is full."""
+        w = _Write(table, op, row, on_conflict, key)
+        if self._task is None:
+            # Not running under the app lifespan (scripts, shell): write through
+            self._write_group([w])
+            return True
+        if len(self._buffer) >= self.max_buffer:
+            self.dropped += 1
+            if self.overflow == "drop_newest":
+                return False
+            self._buffer.popleft()
+        self._buffer.append(w)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write out everything still buffered."""
+        if self._task is not None:
+            # Let the loop finish its current flush rather than cancelling it mid-batch,
+            # which would lose the writes it had already taken off the buffer
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        if self.dropped:
+            logger.warning("write-behind dropped %d writes due to a full buffer", self.dropped)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        while self._buffer:
+            pending: list[_Write] = []
+            while self._buffer and len(pending) < self.batch_size:
+                pending.append(self._buffer.popleft())
+            groups: dict[tuple, dict[Any, _Write]] = {}
+            for i, w in enumerate(pending):
+                group_key = (w.table, w.op, w.on_conflict, tuple(sorted(w.row)))
+                groups.setdefault(group_key, {})[w.key if w.key is not None else ("#", i)] = w
+            await fan_out(*(lambda ws=list(g.values()): self._write_group(ws) for g in groups.values()))
+
+    @staticmethod
+    def _write_group(writes: list[_Write]) -> None:
+        w = writes[0]
+        try:
+            _execute(w.table, w.op, w.on_conflict, [x.row for x in writes])
+        except Exception:
+            # Non-critical by definition: log and move on rather than retrying forever
+            logger.exception("write-behind flush of %d rows to %s failed", len(writes), w.table)
+
+
+@lru_cache
+def get_write_behind() -> WriteBehindQueue:
+    settings = get_settings()
+    return WriteBehindQueue(
+        max_buffer=settings.write_behind_max_buffer,
+        batch_size=settings.write_behind_batch_size,
+        flush_interval=settings.write_behind_flush_interval_seconds,
+        overflow=settings.write_behind_overflow,
+    )
@@ -0,0 +1,47 @@
+"""Fail if importing the app is too slow or pulls in clients that should load lazily.
+
+Run from backend/: python scripts/check_import_time.py [--budget-ms 1500]
+"""
+import argparse
+import subprocess
+import sys
+
+# Must stay out of `import app.main`; they load on first use / during lifespan warm-up
+LAZY_MODULES = ("supabase", "postgrest", "gotrue", "storage3", "openai", "passlib", "httpx", "PIL")
+
+PROBE = "import sys, app.main; print(','.join(m for m in %r if m in sys.modules))" % (LAZY_MODULES,)
+
+
+def import_time_ms() -> tuple[float, list[str]]:
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE], capture_output=True, text=True, check=True)
+    total_us = 0
+    for line in r.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"; top-level rows have no indent
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() and not parts[2].startswith("  ") and parts[1].strip().isdigit():
+            total_us += int(parts[1])
+    leaked = [m for m in r.stdout.strip().split(",") if m]
+    return total_us / 1000, leaked
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    results = [import_time_ms() for _ in range(args.runs)]
+    best = min(ms for ms, _ in results)
+    leaked = results[0][1]
+    print(f"import app.main: best of {args.runs} = {best:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    ok = True
+    if leaked:
+        print(f"eagerly imported: {', '.join(leaked)}")
+        ok = False
+    if best > args.budget_ms:
+        print("over budget")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
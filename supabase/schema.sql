@@ -310,3 +310,422 @@ DROP TRIGGER IF EXISTS trigger_update_search_vector ON journal_entries;
 CREATE TRIGGER trigger_update_search_vector
 BEFORE INSERT OR UPDATE OF title, content ON journal_entries
 FOR EACH ROW EXECUTE FUNCTION update_search_vector();
+
+-- Background insights: one insight per user, type and period (makes job re-runs idempotent)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ai_insights_user_type_range ON ai_insights(user_id, insight_type, date_range_start);
+
+-- Offline sentiment (computed by the API at write time; mood stays user-supplied)
+ALTER TABLE journal_entries ADD COLUMN IF NOT EXISTS sentiment_score REAL;
+ALTER TABLE journal_entries ADD COLUMN IF NOT EXISTS inferred_mood TEXT;
+ALTER TABLE journal_entries ADD COLUMN IF NOT EXISTS inferred_mood_intensity INTEGER CHECK (inferred_mood_intensity >= 1 AND inferred_mood_intensity <= 10);
+
+-- Text statistics (computed by the API at write time)
+ALTER TABLE journal_entries ADD COLUMN IF NOT EXISTS reading_time_seconds INTEGER;
+ALTER TABLE journal_entries ADD COLUMN IF NOT EXISTS sentence_count INTEGER;
+ALTER TABLE journal_entries ADD COLUMN IF NOT EXISTS unique_word_count INTEGER;
+ALTER TABLE journal_entries ADD COLUMN IF NOT EXISTS keywords JSONB;
+
+-- Reminders: user time zone, and updated_at maintenance so the scheduler can sync incrementally
+ALTER TABLE user_preferences ADD COLUMN IF NOT EXISTS timezone TEXT DEFAULT 'UTC';
+CREATE INDEX IF NOT EXISTS idx_user_preferences_updated_at ON user_preferences(updated_at);
+DROP TRIGGER IF EXISTS update_user_preferences_updated_at ON user_preferences;
+CREATE TRIGGER update_user_preferences_updated_at BEFORE UPDATE ON user_preferences
+  FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Entry media processing: status, and transcriptions copied onto the entry for search
+ALTER TABLE entry_media ADD COLUMN IF NOT EXISTS status TEXT DEFAULT 'pending';
+CREATE INDEX IF NOT EXISTS idx_entry_media_status ON entry_media(status) WHERE status IN ('pending', 'processing');
+ALTER TABLE journal_entries ADD COLUMN IF NOT EXISTS media_text TEXT;
+
+CREATE OR REPLACE FUNCTION update_search_vector()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.search_vector =
+    setweight(to_tsvector('english', COALESCE(NEW.title, '')), 'A') ||
+    setweight(to_tsvector('english', COALESCE(NEW.content, '')), 'B') ||
+    setweight(to_tsvector('english', COALESCE(NEW.media_text, '')), 'C');
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_update_search_vector ON journal_entries;
+CREATE TRIGGER trigger_update_search_vector
+BEFORE INSERT OR UPDATE OF title, content, media_text ON journal_entries
+FOR EACH ROW EXECUTE FUNCTION update_search_vector();
+
+-- Trash: listing and purging scan only deleted rows
+CREATE INDEX IF NOT EXISTS idx_entries_trash ON journal_entries(user_id, deleted_at DESC) WHERE deleted_at IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_entries_purge ON journal_entries(deleted_at) WHERE deleted_at IS NOT NULL;
+
+-- Conversation listing without the messages payload: count and last-message preview kept by trigger
+ALTER TABLE ai_conversations ADD COLUMN IF NOT EXISTS message_count INTEGER DEFAULT 0;
+ALTER TABLE ai_conversations ADD COLUMN IF NOT EXISTS last_message_role TEXT;
+ALTER TABLE ai_conversations ADD COLUMN IF NOT EXISTS last_message_preview TEXT;
+CREATE INDEX IF NOT EXISTS idx_ai_conversations_user_updated ON ai_conversations(user_id, updated_at DESC);
+
+CREATE OR REPLACE FUNCTION update_conversation_summary()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.message_count = jsonb_array_length(COALESCE(NEW.messages, '[]'::jsonb));
+  NEW.last_message_role = NEW.messages->-1->>'role';
+  NEW.last_message_preview = LEFT(NEW.messages->-1->>'content', 200);
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_update_conversation_summary ON ai_conversations;
+CREATE TRIGGER trigger_update_conversation_summary
+BEFORE INSERT OR UPDATE OF messages ON ai_conversations
+FOR EACH ROW EXECUTE FUNCTION update_conversation_summary();
+
+UPDATE ai_conversations SET messages = messages WHERE message_count = 0;
+
+-- One page of a conversation's messages (0-based position `idx`), unnested server-side
+CREATE OR REPLACE FUNCTION conversation_messages(p_conversation_id UUID, p_user_id UUID, p_before INTEGER, p_limit INTEGER)
+RETURNS TABLE(idx INTEGER, role TEXT, content TEXT) AS $$
+  SELECT (m.ord - 1)::INTEGER, m.msg->>'role', m.msg->>'content'
+  FROM ai_conversations c, jsonb_array_elements(c.messages) WITH ORDINALITY AS m(msg, ord)
+  WHERE c.id = p_conversation_id AND c.user_id = p_user_id
+    AND (p_before IS NULL OR m.ord - 1 < p_before)
+  ORDER BY m.ord DESC
+  LIMIT p_limit;
+$$ LANGUAGE sql STABLE;
+
+-- Spatial lookups: geohash of (location_lat, location_lng), computed by the API; prefix queries use the index
+ALTER TABLE journal_entries ADD COLUMN IF NOT EXISTS geohash TEXT;
+CREATE INDEX IF NOT EXISTS idx_entries_user_geohash ON journal_entries(user_id, geohash text_pattern_ops) WHERE geohash IS NOT NULL AND deleted_at IS NULL;
+
+-- Catalog versions: bumped on any change to templates/prompts so API snapshots refresh only when needed
+CREATE TABLE IF NOT EXISTS catalog_versions (
+  name TEXT PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 1
+);
+INSERT INTO catalog_versions (name) VALUES ('templates'), ('prompts') ON CONFLICT (name) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_catalog_version()
+RETURNS TRIGGER AS $$
+BEGIN
+  UPDATE catalog_versions SET version = version + 1 WHERE name = TG_TABLE_NAME;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_bump_templates_version ON templates;
+CREATE TRIGGER trigger_bump_templates_version
+AFTER INSERT OR UPDATE OR DELETE ON templates
+FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version();
+
+DROP TRIGGER IF EXISTS trigger_bump_prompts_version ON prompts;
+CREATE TRIGGER trigger_bump_prompts_version
+AFTER INSERT OR UPDATE OR DELETE ON prompts
+FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version();
+
+-- Autosave: revision bumped on every title/content change unless the writer sets it explicitly
+ALTER TABLE journal_entries ADD COLUMN IF NOT EXISTS revision INTEGER NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION bump_entry_revision()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF NEW.revision IS NOT DISTINCT FROM OLD.revision THEN
+    NEW.revision = OLD.revision + 1;
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_bump_entry_revision ON journal_entries;
+CREATE TRIGGER trigger_bump_entry_revision
+BEFORE UPDATE OF title, content ON journal_entries
+FOR EACH ROW EXECUTE FUNCTION bump_entry_revision();
+
+-- Goal progress: counters maintained incrementally from entry writes
+ALTER TABLE user_goals ADD COLUMN IF NOT EXISTS metric TEXT DEFAULT 'manual' CHECK (metric IN ('manual', 'entries', 'words'));
+ALTER TABLE user_goals ADD COLUMN IF NOT EXISTS target_value INTEGER;
+ALTER TABLE user_goals ADD COLUMN IF NOT EXISTS period TEXT;
+ALTER TABLE user_goals ADD COLUMN IF NOT EXISTS period_start DATE;
+ALTER TABLE user_goals ADD COLUMN IF NOT EXISTS period_end DATE;
+ALTER TABLE user_goals ADD COLUMN IF NOT EXISTS current_value INTEGER NOT NULL DEFAULT 0;
+CREATE INDEX IF NOT EXISTS idx_user_goals_counted ON user_goals(user_id) WHERE metric IN ('entries', 'words');
+
+-- Seed the counter once when a counted goal is created or its window/metric changes
+CREATE OR REPLACE FUNCTION init_goal_counter()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF NEW.metric IN ('entries', 'words') AND (TG_OP = 'INSERT' OR NEW.metric IS DISTINCT FROM OLD.metric
+      OR NEW.period_start IS DISTINCT FROM OLD.period_start OR NEW.period_end IS DISTINCT FROM OLD.period_end) THEN
+    SELECT CASE NEW.metric WHEN 'entries' THEN COUNT(*) ELSE COALESCE(SUM(word_count), 0) END
+    INTO NEW.current_value
+    FROM journal_entries
+    WHERE user_id = NEW.user_id AND deleted_at IS NULL AND NOT COALESCE(is_draft, FALSE)
+      AND entry_date BETWEEN NEW.period_start AND NEW.period_end;
+  END IF;
+  IF NEW.metric IN ('entries', 'words') AND NEW.target_value > 0 THEN
+    NEW.progress = LEAST(100, NEW.current_value * 100 / NEW.target_value);
+    NEW.completed = NEW.current_value >= NEW.target_value;
+    NEW.completed_at = CASE WHEN NEW.completed THEN COALESCE(OLD.completed_at, NOW()) END;
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_init_goal_counter ON user_goals;
+CREATE TRIGGER trigger_init_goal_counter
+BEFORE INSERT OR UPDATE ON user_goals
+FOR EACH ROW EXECUTE FUNCTION init_goal_counter();
+
+-- Apply each entry write as a delta to the user's counted goals whose window contains it
+CREATE OR REPLACE FUNCTION update_goal_counters()
+RETURNS TRIGGER AS $$
+DECLARE
+  uid UUID;
+  new_on BOOLEAN := FALSE;
+  old_on BOOLEAN := FALSE;
+  new_date DATE;
+  old_date DATE;
+  new_words INTEGER := 0;
+  old_words INTEGER := 0;
+BEGIN
+  IF TG_OP <> 'DELETE' THEN
+    uid := NEW.user_id;
+    new_on := NEW.deleted_at IS NULL AND NOT COALESCE(NEW.is_draft, FALSE);
+    new_date := NEW.entry_date;
+    new_words := COALESCE(NEW.word_count, 0);
+  END IF;
+  IF TG_OP <> 'INSERT' THEN
+    uid := OLD.user_id;
+    old_on := OLD.deleted_at IS NULL AND NOT COALESCE(OLD.is_draft, FALSE);
+    old_date := OLD.entry_date;
+    old_words := COALESCE(OLD.word_count, 0);
+  END IF;
+  UPDATE user_goals g
+  SET current_value = GREATEST(g.current_value + d.delta, 0), updated_at = NOW()
+  FROM (
+    SELECT id,
+      (CASE WHEN new_on AND new_date BETWEEN period_start AND period_end
+            THEN CASE metric WHEN 'entries' THEN 1 ELSE new_words END ELSE 0 END)
+      - (CASE WHEN old_on AND old_date BETWEEN period_start AND period_end
+            THEN CASE metric WHEN 'entries' THEN 1 ELSE old_words END ELSE 0 END) AS delta
+    FROM user_goals
+    WHERE user_id = uid AND metric IN ('entries', 'words')
+  ) d
+  WHERE g.id = d.id AND d.delta <> 0;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_update_goal_counters ON journal_entries;
+CREATE TRIGGER trigger_update_goal_counters
+AFTER INSERT OR DELETE OR UPDATE OF entry_date, word_count, is_draft, deleted_at ON journal_entries
+FOR EACH ROW EXECUTE FUNCTION update_goal_counters();
+
+-- Tag management: entry_tags carries user_id (filled from the entry) so per-user batch
+-- operations are index scans, and `tags` holds usage counters maintained per statement
+ALTER TABLE entry_tags ADD COLUMN IF NOT EXISTS user_id UUID REFERENCES users(id) ON DELETE CASCADE;
+UPDATE entry_tags et SET user_id = e.user_id FROM journal_entries e WHERE e.id = et.entry_id AND et.user_id IS NULL;
+CREATE INDEX IF NOT EXISTS idx_entry_tags_user_tag ON entry_tags(user_id, tag);
+
+CREATE OR REPLACE FUNCTION set_entry_tag_user()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF NEW.user_id IS NULL THEN
+    SELECT user_id INTO NEW.user_id FROM journal_entries WHERE id = NEW.entry_id;
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_set_entry_tag_user ON entry_tags;
+CREATE TRIGGER trigger_set_entry_tag_user
+BEFORE INSERT ON entry_tags
+FOR EACH ROW EXECUTE FUNCTION set_entry_tag_user();
+
+-- Rebuild counters once from existing rows
+INSERT INTO tags (user_id, tag, usage_count, last_used_at)
+SELECT user_id, tag, COUNT(*), MAX(created_at) FROM entry_tags WHERE user_id IS NOT NULL GROUP BY user_id, tag
+ON CONFLICT (user_id, tag) DO UPDATE SET usage_count = EXCLUDED.usage_count, last_used_at = EXCLUDED.last_used_at;
+DELETE FROM tags t WHERE NOT EXISTS (SELECT 1 FROM entry_tags et WHERE et.user_id = t.user_id AND et.tag = t.tag);
+
+CREATE OR REPLACE FUNCTION update_tag_counts()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('DELETE', 'UPDATE') THEN
+    UPDATE tags t SET usage_count = t.usage_count - d.n
+    FROM (SELECT user_id, tag, COUNT(*) AS n FROM old_rows WHERE user_id IS NOT NULL GROUP BY user_id, tag) d
+    WHERE t.user_id = d.user_id AND t.tag = d.tag;
+    DELETE FROM tags t USING (SELECT DISTINCT user_id, tag FROM old_rows) d
+    WHERE t.user_id = d.user_id AND t.tag = d.tag AND t.usage_count <= 0;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO tags (user_id, tag, usage_count, last_used_at)
+    SELECT user_id, tag, COUNT(*), NOW() FROM new_rows WHERE user_id IS NOT NULL GROUP BY user_id, tag
+    ON CONFLICT (user_id, tag) DO UPDATE SET usage_count = tags.usage_count + EXCLUDED.usage_count, last_used_at = NOW();
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_tag_counts_insert ON entry_tags;
+CREATE TRIGGER trigger_tag_counts_insert AFTER INSERT ON entry_tags
+REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION update_tag_counts();
+DROP TRIGGER IF EXISTS trigger_tag_counts_delete ON entry_tags;
+CREATE TRIGGER trigger_tag_counts_delete AFTER DELETE ON entry_tags
+REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION update_tag_counts();
+DROP TRIGGER IF EXISTS trigger_tag_counts_update ON entry_tags;
+CREATE TRIGGER trigger_tag_counts_update AFTER UPDATE ON entry_tags
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION update_tag_counts();
+
+-- Merge `p_sources` into `p_target` across a user's entries (rename = one source).
+-- Returns the entries touched and how many of them newly gained the target tag.
+DROP FUNCTION IF EXISTS merge_tags(UUID, TEXT[], TEXT);
+CREATE OR REPLACE FUNCTION merge_tags(p_user_id UUID, p_sources TEXT[], p_target TEXT)
+RETURNS TABLE(entries_updated INTEGER, target_added INTEGER) AS $$
+DECLARE
+  affected INTEGER;
+  added INTEGER;
+BEGIN
+  p_sources := array_remove(p_sources, p_target);
+  SELECT COUNT(DISTINCT entry_id) INTO affected FROM entry_tags WHERE user_id = p_user_id AND tag = ANY(p_sources);
+  -- Entries that already carry the target (or another source) keep a single row
+  DELETE FROM entry_tags s
+  WHERE s.user_id = p_user_id AND s.tag = ANY(p_sources)
+    AND EXISTS (
+      SELECT 1 FROM entry_tags o
+      WHERE o.entry_id = s.entry_id AND (o.tag = p_target OR (o.tag = ANY(p_sources) AND o.tag < s.tag))
+    );
+  UPDATE entry_tags SET tag = p_target WHERE user_id = p_user_id AND tag = ANY(p_sources);
+  GET DIAGNOSTICS added = ROW_COUNT;
+  RETURN QUERY SELECT affected, added;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Remove tags from all of a user's entries; returns entries affected
+CREATE OR REPLACE FUNCTION delete_tags(p_user_id UUID, p_tags TEXT[])
+RETURNS INTEGER AS $$
+DECLARE
+  affected INTEGER;
+BEGIN
+  DELETE FROM entry_tags WHERE user_id = p_user_id AND tag = ANY(p_tags);
+  GET DIAGNOSTICS affected = ROW_COUNT;
+  RETURN affected;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Heatmap: per-day entry count, word total and mood counts, aggregated in the database
+CREATE OR REPLACE FUNCTION entry_day_rollup(p_user_id UUID, p_start DATE, p_end DATE)
+RETURNS TABLE(entry_date DATE, entries INTEGER, words INTEGER, moods JSONB) AS $$
+  SELECT d.entry_date, SUM(d.n)::INTEGER, SUM(d.w)::INTEGER,
+         COALESCE(jsonb_object_agg(d.mood, d.n) FILTER (WHERE d.mood IS NOT NULL), '{}'::JSONB)
+  FROM (
+    SELECT e.entry_date, e.mood, COUNT(*) AS n, COALESCE(SUM(e.word_count), 0) AS w
+    FROM journal_entries e
+    WHERE e.user_id = p_user_id AND e.entry_date BETWEEN p_start AND p_end
+      AND e.deleted_at IS NULL AND e.is_draft = FALSE
+    GROUP BY e.entry_date, e.mood
+  ) d
+  GROUP BY d.entry_date
+  ORDER BY d.entry_date;
+$$ LANGUAGE sql STABLE;
+
+-- Token revocations (refresh jti and session families), shared by all API workers
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+  id TEXT PRIMARY KEY,
+  expires_at TIMESTAMPTZ NOT NULL,
+  revoked_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_revoked_at ON revoked_tokens(revoked_at);
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at ON revoked_tokens(expires_at);
+ALTER TABLE revoked_tokens ENABLE ROW LEVEL SECURITY;
+
+-- Map pins: a user's located entries inside a viewport, clustered by geohash prefix
+CREATE INDEX IF NOT EXISTS idx_entries_user_lat_lng ON journal_entries(user_id, location_lat, location_lng) WHERE geohash IS NOT NULL AND deleted_at IS NULL;
+
+CREATE OR REPLACE FUNCTION map_clusters(
+  p_user_id UUID, p_precision INTEGER,
+  p_min_lat DOUBLE PRECISION, p_min_lng DOUBLE PRECISION, p_max_lat DOUBLE PRECISION, p_max_lng DOUBLE PRECISION,
+  p_limit INTEGER
+)
+RETURNS TABLE(cell TEXT, count INTEGER, lat DOUBLE PRECISION, lng DOUBLE PRECISION, entry_id UUID, latest_entry_date DATE) AS $$
+  SELECT LEFT(e.geohash, p_precision),
+         COUNT(*)::INTEGER,
+         AVG(e.location_lat)::DOUBLE PRECISION,
+         AVG(e.location_lng)::DOUBLE PRECISION,
+         CASE WHEN COUNT(*) = 1 THEN (ARRAY_AGG(e.id))[1] END,
+         MAX(e.entry_date)
+  FROM journal_entries e
+  WHERE e.user_id = p_user_id AND e.deleted_at IS NULL AND e.geohash IS NOT NULL
+    AND e.location_lat BETWEEN p_min_lat AND p_max_lat
+    AND e.location_lng BETWEEN p_min_lng AND p_max_lng
+  GROUP BY 1
+  ORDER BY 2 DESC, 1
+  LIMIT p_limit;
+$$ LANGUAGE sql STABLE;
+
+-- Mood trends: per-bucket (day/week/month) mood counts and average intensity, aggregated in the database
+CREATE OR REPLACE FUNCTION mood_buckets(p_user_id UUID, p_start DATE, p_bucket TEXT, p_inferred BOOLEAN)
+RETURNS TABLE(start DATE, count INTEGER, moods JSONB, average_intensity NUMERIC) AS $$
+  SELECT b.start, SUM(b.n)::INTEGER,
+         jsonb_object_agg(b.mood, b.n),
+         ROUND(SUM(b.intensity_sum)::NUMERIC / NULLIF(SUM(b.intensity_n), 0), 2)
+  FROM (
+    SELECT DATE_TRUNC(p_bucket, e.entry_date)::DATE AS start, m.mood, COUNT(*) AS n,
+           SUM(m.intensity) AS intensity_sum, COUNT(m.intensity) AS intensity_n
+    FROM journal_entries e
+    CROSS JOIN LATERAL (
+      SELECT CASE WHEN p_inferred THEN e.inferred_mood ELSE e.mood END AS mood,
+             CASE WHEN p_inferred THEN e.inferred_mood_intensity ELSE e.mood_intensity END AS intensity
+    ) m
+    WHERE e.user_id = p_user_id AND e.deleted_at IS NULL AND e.is_draft = FALSE
+      AND (p_start IS NULL OR e.entry_date >= p_start)
+      AND m.mood IS NOT NULL
+    GROUP BY 1, 2
+  ) b
+  GROUP BY b.start
+  ORDER BY b.start;
+$$ LANGUAGE sql STABLE;
+
+-- Background job leases: one worker at a time runs each named job (insights, reminders)
+CREATE TABLE IF NOT EXISTS job_leases (
+  name TEXT PRIMARY KEY,
+  holder TEXT NOT NULL,
+  expires_at TIMESTAMPTZ NOT NULL
+);
+ALTER TABLE job_leases ENABLE ROW LEVEL SECURITY;
+
+-- Take or renew a lease; TRUE if `p_holder` holds it for the next `p_seconds`
+CREATE OR REPLACE FUNCTION try_job_lease(p_name TEXT, p_holder TEXT, p_seconds DOUBLE PRECISION)
+RETURNS BOOLEAN AS $$
+  INSERT INTO job_leases AS l (name, holder, expires_at)
+  VALUES (p_name, p_holder, NOW() + make_interval(secs => p_seconds))
+  ON CONFLICT (name) DO UPDATE SET holder = EXCLUDED.holder, expires_at = EXCLUDED.expires_at
+  WHERE l.holder = EXCLUDED.holder OR l.expires_at < NOW()
+  RETURNING TRUE;
+$$ LANGUAGE sql;
+
+-- Nearby: a user's entries within `p_radius_km` of a point, nearest first. `p_cells` are
+-- geohash prefixes covering the circle; each becomes a range scan on idx_entries_user_geohash.
+CREATE OR REPLACE FUNCTION nearby_entries(
+  p_user_id UUID, p_cells TEXT[], p_lat DOUBLE PRECISION, p_lng DOUBLE PRECISION,
+  p_radius_km DOUBLE PRECISION, p_limit INTEGER
+)
+RETURNS TABLE(
+  id UUID, title TEXT, entry_date DATE, mood TEXT, location TEXT,
+  location_lat DOUBLE PRECISION, location_lng DOUBLE PRECISION, distance_km DOUBLE PRECISION
+) AS $$
+  SELECT n.id, n.title, n.entry_date, n.mood, n.location, n.lat, n.lng, ROUND(n.d::NUMERIC, 3)::DOUBLE PRECISION
+  FROM (
+    SELECT e.id, e.title, e.entry_date, e.mood, e.location,
+           e.location_lat::DOUBLE PRECISION AS lat, e.location_lng::DOUBLE PRECISION AS lng,
+           2 * 6371.0 * ASIN(SQRT(
+             POWER(SIN(RADIANS(e.location_lat::DOUBLE PRECISION - p_lat) / 2), 2)
+             + COS(RADIANS(p_lat)) * COS(RADIANS(e.location_lat::DOUBLE PRECISION))
+               * POWER(SIN(RADIANS(e.location_lng::DOUBLE PRECISION - p_lng) / 2), 2)
+           )) AS d
+    FROM unnest(p_cells) AS c(prefix)
+    JOIN journal_entries e
+      ON e.user_id = p_user_id AND e.deleted_at IS NULL AND e.geohash IS NOT NULL
+     AND e.geohash ~>=~ c.prefix AND e.geohash ~<~ (c.prefix || '~')
+  ) n
+  WHERE n.d <= p_radius_km
+  ORDER BY n.d, n.id
+  LIMIT p_limit;
+$$ LANGUAGE sql STABLE;